@@ -0,0 +1,130 @@
+# API recorder
+# Writes every response the Binance API gives the monitor, and every batch of user data stream events,
+# to a gzip compressed JSONL file that tools/replay.py can feed back through start.py offline
+#
+# The first line is {"meta": {...}} with the configuration the recording was made with, then one line per response
+#   {"t": seconds since the recording started, "method": "get", "path": "/api/v3/allOrders", "params": {...}, "response": ...}
+# with "error": {"status_code": ..., "text": ...} instead of "response" when Binance answered with an error, and
+#   {"t": ..., "stream": [[event, order], ...]}
+# per batch of user data stream events
+
+import gzip
+import json
+from threading import Lock
+from time import monotonic, time
+from urllib.parse import urlparse
+
+from binance.exceptions import BinanceAPIException
+
+# Added to every signed request, they'd never match on replay
+IGNORED_PARAMS = ("timestamp", "signature", "recvWindow")
+
+# Params of a request as they identify it
+def request_params(kwargs):
+    params = kwargs.get("data") or kwargs.get("params") or {}
+    if not isinstance(params, dict):
+        params = dict(params)
+    return {key: value for key, value in params.items() if key not in IGNORED_PARAMS}
+
+# Key a response is looked up by on replay
+def request_key(method, path, params):
+    return method.lower() + " " + path + "?" + json.dumps(params, sort_keys=True, default=str)
+
+# Meta and records of a recording made by ApiRecorder
+def read_recording(path):
+    meta, records = {}, []
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            record = json.loads(line)
+            if "meta" in record:
+                meta = record["meta"]
+            else:
+                records.append(record)
+    return meta, records
+
+class ApiRecorder:
+
+    def __init__(self, path, meta = None):
+
+        self.path       = path
+
+        # Working
+        self.lock       = Lock()
+        self.file       = gzip.open(path, "wt")
+        self.start      = monotonic()
+        self.records    = 0 # Responses and stream batches written
+
+        self.write({"meta": dict(meta or {}, started=time())})
+        self.records    = 0
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            if self.file is not None:
+                self.file.write(line)
+                self.records += 1
+
+    def record_response(self, method, uri, params, response = None, error = None):
+        record = {"t": monotonic() - self.start, "method": method.lower(), "path": urlparse(uri).path, "params": params}
+        if error is not None:
+            record["error"] = {"status_code": error.status_code, "text": json.dumps({"code": error.code, "msg": error.message})}
+        else:
+            record["response"] = response
+        self.write(record)
+
+    def record_stream(self, events):
+        if events:
+            self.write({"t": monotonic() - self.start, "stream": [list(event) for event in events]})
+
+    # Record the responses of a python-binance Client
+    def attach(self, client):
+        request = client._request
+
+        def recorded_request(method, uri, signed, force_params = False, **kwargs):
+            # Params are copied first, python-binance adds the timestamp and signature to the same dict
+            params = request_params(kwargs)
+            try:
+                response = request(method, uri, signed, force_params, **kwargs)
+            except BinanceAPIException as e:
+                self.record_response(method, uri, params, error=e)
+                raise
+            self.record_response(method, uri, params, response)
+            return response
+
+        client._request = recorded_request
+        return client
+
+    # Same as attach() for a python-binance AsyncClient
+    def attach_async(self, client):
+        request = client._request
+
+        async def recorded_request(method, uri, signed, force_params = False, **kwargs):
+            params = request_params(kwargs)
+            try:
+                response = await request(method, uri, signed, force_params, **kwargs)
+            except BinanceAPIException as e:
+                self.record_response(method, uri, params, error=e)
+                raise
+            self.record_response(method, uri, params, response)
+            return response
+
+        client._request = recorded_request
+        return client
+
+    # Record the events a user_stream.UserStream hands out
+    def attach_stream(self, user_stream):
+        get_events = user_stream.get_events
+
+        def recorded_get_events(timeout = None):
+            events = get_events(timeout)
+            self.record_stream(events)
+            return events
+
+        user_stream.get_events = recorded_get_events
+        return user_stream
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
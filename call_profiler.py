@@ -0,0 +1,138 @@
+# Call profiler for BinanceAPI
+# Wraps the public methods of a BinanceAPI object and its client's requests, and records how long every
+# method took and how many REST requests (and how much request weight) it made, as a call tree
+# that can be printed as a summary table or written as a Chrome trace (chrome://tracing, ui.perfetto.dev)
+
+import json
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock, get_ident
+from time import perf_counter
+
+from rate_limiter import endpoint_weight
+
+class CallNode:
+
+    def __init__(self, name):
+
+        self.name       = name
+        self.calls      = 0
+        self.wall       = 0.0 # Seconds, including nested calls
+        self.requests   = 0   # REST requests made by this method itself
+        self.weight     = 0   # Request weight of those requests, /sapi and /fapi requests count as 0
+        self.children   = {}  # name -> CallNode
+
+    def child(self, name):
+        if name not in self.children:
+            self.children[name] = CallNode(name)
+        return self.children[name]
+
+    # Requests and weight including nested calls
+    def total_requests(self):
+        return self.requests + sum(child.total_requests() for child in self.children.values())
+
+    def total_weight(self):
+        return self.weight + sum(child.total_weight() for child in self.children.values())
+
+class CallProfiler:
+
+    def __init__(self, max_trace_events = 100000):
+
+        self.max_trace_events   = max_trace_events
+
+        # Working
+        self.lock               = Lock()
+        # Stack of open CallNodes as a tuple, a context variable so calls BinanceAPI runs on other threads
+        # with copy_context() (eg. general_prefetch) stay nested under the method that made them
+        self.current            = ContextVar("call_profiler_stack", default = ())
+        self.root               = CallNode("") # Calls made from outside BinanceAPI
+        self.start              = perf_counter()
+        self.trace_events       = []
+
+    # Instrument every public method of api and the requests of its client
+    def attach(self, api):
+        for name in dir(type(api)):
+            if not name.startswith("_") and callable(getattr(type(api), name)):
+                setattr(api, name, self.wrap(name, getattr(api, name)))
+        if api.client is not None:
+            self.attach_client(api.client)
+        return api
+
+    def wrap(self, name, method):
+        @wraps(method)
+        def profiled(*args, **kwargs):
+            stack = self.current.get()
+            with self.lock:
+                node = (stack[-1] if stack else self.root).child(name)
+            token = self.current.set(stack + (node,))
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = perf_counter()
+                self.current.reset(token)
+                with self.lock:
+                    node.calls  += 1
+                    node.wall   += end - start
+                    if len(self.trace_events) < self.max_trace_events:
+                        self.trace_events.append({"name": name, "ph": "X", "pid": 0, "tid": get_ident(),
+                                                  "ts": (start - self.start) * 1e6, "dur": (end - start) * 1e6})
+        return profiled
+
+    # Count the requests of a python-binance Client against the method that made them
+    def attach_client(self, client):
+        request = client._request
+
+        def profiled_request(method, uri, signed, force_params = False, **kwargs):
+            stack = self.current.get()
+            if stack:
+                # Requests the poll loop makes on a shared client aren't BinanceAPI's
+                weight = endpoint_weight(method, uri, kwargs.get("data") or kwargs.get("params"))
+                with self.lock:
+                    stack[-1].requests  += 1
+                    stack[-1].weight    += weight or 0
+            return request(method, uri, signed, force_params, **kwargs)
+
+        client._request = profiled_request
+        return client
+
+    # Per method totals over every place it was called from, slowest first
+    def summary(self):
+        totals = {}
+        with self.lock:
+            nodes = list(self.root.children.values())
+            while nodes:
+                node = nodes.pop()
+                total = totals.setdefault(node.name, {'calls': 0, 'wall': 0.0, 'requests': 0, 'weight': 0})
+                total['calls']      += node.calls
+                total['wall']       += node.wall
+                total['requests']   += node.requests
+                total['weight']     += node.weight
+                nodes += node.children.values()
+        return sorted(totals.items(), key=lambda item: item[1]['wall'], reverse=True)
+
+    # Summary table followed by the call tree, as text
+    def report(self):
+        lines = ["method".ljust(40) + "calls".rjust(8) + "total ms".rjust(12) + "avg ms".rjust(10) + "own reqs".rjust(10) + "own weight".rjust(12)]
+        for name, total in self.summary():
+            lines.append(name.ljust(40) + str(total['calls']).rjust(8) + format(total['wall'] * 1e3, '.1f').rjust(12)
+                         + format(total['wall'] * 1e3 / max(1, total['calls']), '.2f').rjust(10)
+                         + str(total['requests']).rjust(10) + str(total['weight']).rjust(12))
+        lines.append("")
+        lines.append("call tree (calls, total ms, requests and weight including nested calls)")
+        with self.lock:
+            self.report_tree(self.root, 0, lines)
+        return "\n".join(lines)
+
+    def report_tree(self, node, depth, lines):
+        for child in sorted(node.children.values(), key=lambda child: child.wall, reverse=True):
+            lines.append("  " * depth + child.name + "  " + str(child.calls) + "x  " + format(child.wall * 1e3, '.1f') + " ms  "
+                         + str(child.total_requests()) + " requests  " + str(child.total_weight()) + " weight")
+            self.report_tree(child, depth + 1, lines)
+
+    # Write the recorded calls in the Chrome trace event format
+    def write_trace(self, path):
+        with self.lock:
+            events = list(self.trace_events)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
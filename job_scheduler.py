@@ -0,0 +1,159 @@
+# Job scheduler for the periodic work of the monitor (order polling, balance alerts, heartbeats, snapshots)
+# Jobs run on a monotonic clock at start + n * interval, however long they or the other jobs take, so
+# nothing drifts. Jitter spreads a run over up to `jitter` seconds after its slot without moving later slots
+# Slow jobs can run in the background, in a thread (sync engine) or as a task (async engine), so they
+# don't hold up the jobs around them. A job never overlaps itself, a run that's due while the previous one
+# is still going is skipped. A background run that raises is logged and retried, the monitor keeps going
+
+import asyncio
+import heapq
+import random
+import traceback
+from itertools import count
+from threading import Thread, Lock
+from time import monotonic
+
+import utility
+
+# Seconds after which a failed background run is tried again, unless its next regular run comes sooner
+RETRY_DELAY = 60
+
+class Job:
+
+    def __init__(self, name, function, interval, jitter, background):
+
+        self.name       = name
+        self.function   = function
+        self.interval   = interval
+        self.jitter     = jitter
+        self.background = background
+
+        # Working
+        self.slot       = None # Start of the next regular run, before jitter
+        self.running    = None # Thread or asyncio.Task of a background run
+        self.runs       = 0
+        self.skipped    = 0
+        self.failures   = 0 # Background runs that raised
+
+class JobScheduler:
+
+    def __init__(self, clock = monotonic, uniform = random.uniform):
+
+        self.clock      = clock
+        self.uniform    = uniform
+
+        # Working
+        self.jobs       = {}
+        self.queue      = [] # (run at, sequence, name, regular)
+        self.sequence   = count()
+        self.lock       = Lock()
+
+    # Run function every interval seconds, the first time after delay seconds (default one interval)
+    # A function returning a number of seconds is run again that much later, on top of its regular runs,
+    # eg. to retry something that had to be postponed
+    # With interval None there are no regular runs, the function runs after delay and then whenever it asks to
+    def add(self, name, function, interval, delay = None, jitter = 0, background = False):
+        job = Job(name, function, interval, jitter, background)
+        with self.lock:
+            self.jobs[name] = job
+            if interval is None:
+                self.push(self.clock() + (delay or 0), name, False)
+            else:
+                job.slot = self.clock() + (interval if delay is None else delay)
+                self.push(job.slot + self.spread(job), name, True)
+        return job
+
+    def spread(self, job):
+        return self.uniform(0, job.jitter) if job.jitter else 0
+
+    def push(self, run_at, name, regular):
+        heapq.heappush(self.queue, (run_at, next(self.sequence), name, regular))
+
+    # Seconds until the next job is due
+    def time_until_due(self, now = None):
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            if not self.queue:
+                return None
+            return max(0, self.queue[0][0] - now)
+
+    # Take the jobs that are due off the queue and schedule their next regular run
+    def due(self, now = None):
+        if now is None:
+            now = self.clock()
+        jobs = []
+        with self.lock:
+            while self.queue and self.queue[0][0] <= now:
+                run_at, sequence, name, regular = heapq.heappop(self.queue)
+                job = self.jobs.get(name)
+                if job is None:
+                    continue # Removed
+                if regular:
+                    # Next slot after now, slots missed while a job ran long are dropped rather than run back to back
+                    job.slot += job.interval
+                    if job.slot <= now:
+                        job.slot += job.interval * ((now - job.slot) // job.interval + 1)
+                    self.push(job.slot + self.spread(job), name, True)
+                jobs.append(job)
+        return jobs
+
+    def remove(self, name):
+        with self.lock:
+            self.jobs.pop(name, None)
+
+    # A run has finished, schedule the extra run it asked for
+    def finished(self, job, result):
+        job.runs += 1
+        if isinstance(result, (int, float)) and not isinstance(result, bool):
+            with self.lock:
+                self.push(self.clock() + result, job.name, False)
+
+    # A background run raised error, log it as ('NOK', message) and retry it, eg. after a transient API error
+    def failed(self, job, error):
+        _response_tuple = ('NOK',  f"{ utility.my_log('Exception','job '+job.name,None,''.join(traceback.format_exception(type(error), error, error.__traceback__, limit = 2)))}")
+        print(_response_tuple[1])
+        job.failures += 1
+        self.finished(job, RETRY_DELAY if job.interval is None or job.interval > RETRY_DELAY else None)
+        return(_response_tuple)
+
+    # Run the jobs that are due, background jobs in their own thread
+    def run_pending(self, now = None):
+        for job in self.due(now):
+            if not job.background:
+                self.finished(job, job.function())
+            elif job.running is not None and job.running.is_alive():
+                job.skipped += 1
+            else:
+                job.running = Thread(target=self.run_background, args=(job,), name="job_" + job.name, daemon=True)
+                job.running.start()
+
+    def run_background(self, job):
+        try:
+            result = job.function()
+        except Exception as e:
+            self.failed(job, e)
+        else:
+            self.finished(job, result)
+
+    # Run the jobs forever on the asyncio event loop, coroutine functions as tasks of their own
+    async def run_async(self):
+        while True:
+            for job in self.due():
+                if not asyncio.iscoroutinefunction(job.function):
+                    self.finished(job, job.function())
+                elif job.running is not None and not job.running.done():
+                    job.skipped += 1
+                else:
+                    job.running = asyncio.create_task(job.function())
+                    job.running.add_done_callback(lambda task, job=job: self.task_done(job, task))
+            wait = self.time_until_due()
+            await asyncio.sleep(1 if wait is None else wait)
+
+    def task_done(self, job, task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.failed(job, task.exception())
+        else:
+            self.finished(job, task.result())
@@ -0,0 +1,152 @@
+# Prometheus metrics endpoint
+# A few histograms and gauges rendered in the Prometheus text format by a small HTTP server thread,
+# so it doesn't need anything beyond the standard library
+
+import asyncio
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from threading import Thread, Lock
+from time import monotonic
+
+# Bucket upper bounds in seconds, from a fast in-memory diff to a REST call close to its timeout
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class Histogram:
+
+    def __init__(self, name, help, buckets = DEFAULT_BUCKETS):
+
+        self.name       = name
+        self.help       = help
+        self.buckets    = tuple(buckets) + (float("inf"),)
+
+        # Working
+        self.lock       = Lock()
+        self.counts     = [0] * len(self.buckets)
+        self.sum        = 0.0
+        self.count      = 0
+
+    def observe(self, value):
+        with self.lock:
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[position] += 1
+                    break
+            self.sum    += value
+            self.count  += 1
+
+    # Wrap a function or coroutine function so every call is observed
+    def time(self, function):
+        if asyncio.iscoroutinefunction(function):
+            @wraps(function)
+            async def timed_async(*args, **kwargs):
+                start = monotonic()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    self.observe(monotonic() - start)
+            return timed_async
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = monotonic()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(monotonic() - start)
+        return timed
+
+    def render(self):
+        lines = ["# HELP " + self.name + " " + self.help, "# TYPE " + self.name + " histogram"]
+        with self.lock:
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                lines.append(self.name + '_bucket{le="' + format_value(bound) + '"} ' + str(cumulative))
+            lines.append(self.name + "_sum " + repr(self.sum))
+            lines.append(self.name + "_count " + str(self.count))
+        return lines
+
+class Gauge:
+
+    def __init__(self, name, help, function, label = None):
+
+        # function returns the current value, or {label value: value} when label is set
+        self.name       = name
+        self.help       = help
+        self.function   = function
+        self.label      = label
+
+    def render(self):
+        lines = ["# HELP " + self.name + " " + self.help, "# TYPE " + self.name + " gauge"]
+        value = self.function()
+        if self.label is None:
+            lines.append(self.name + " " + format_value(value))
+        else:
+            for label_value, labelled in value.items():
+                lines.append(self.name + "{" + self.label + '="' + str(label_value) + '"} ' + format_value(labelled))
+        return lines
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.metrics = []
+
+    # Register a metric, returns it so it can be assigned in one line
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines += metric.render()
+            except Exception as e:
+                # A gauge reading state that is being changed shouldn't take the whole endpoint down
+                print("-- Metric " + metric.name + " failed: " + repr(e) + " --")
+        return "\n".join(lines) + "\n"
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class MetricsServer:
+
+    def __init__(self, registry, port, host = ""):
+
+        self.registry   = registry
+        self.port       = port
+        self.host       = host
+
+        # Working
+        self.server     = None
+        self.thread     = None
+
+    # Serve /metrics from a background thread
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would drown out the order log
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.thread = Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
@@ -2,22 +2,36 @@
 # Original Source: https://raw.githubusercontent.com/nedludd0/binance-exchange-python-api/master/my_class.py
 
 # Mathematical
-from decimal import getcontext, ROUND_DOWN, Decimal
-import math
+from decimal import localcontext, Decimal
 
 # Logs
 import traceback
 from pprint import pprint
 
+# Cache
+from threading import Thread, Lock
+from time import monotonic
+
+# Concurrency
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+# Vectorized Valuation --> optional, numpy is not a requirement
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Python Binance Lib
 from binance.client import Client, BinanceAPIException
 
 # My
 import utility
+from quantizer import SymbolQuantizer, SIZE_EXPONENT, TRUNCATE_CONTEXT, step_exponent, truncate
 
 class BinanceAPI:
 
-    def __init__(self, p_api_pub_key = None, p_api_secret_key = None, p_symbol_first = None, p_symbol_second = None, p_wallet = None):
+    def __init__(self, p_api_pub_key = None, p_api_secret_key = None, p_symbol_first = None, p_symbol_second = None, p_wallet = None, p_rate_limiter = None, p_exchange_info_ttl = 3600, p_client = None, p_profiler = None, p_trade_fee_ttl = 86400):
 
         # Symbol
         if p_wallet:
@@ -34,13 +48,54 @@ class BinanceAPI:
         # Working
         self.client_builded = None
         self.client         = None
-
-        # Build Client
+        self.rate_limiter   = p_rate_limiter # Optional shared rate_limiter.RateLimiter
+
+        # Exchange Info Cache --> p_exchange_info_ttl = None disables it
+        self.exchange_info_ttl          = p_exchange_info_ttl
+        self.exchange_info_cache        = None  # { 'rateLimits': [...], 'symbols': { symbol: symbol info } }
+        self.exchange_info_loaded       = None  # monotonic() of the last successful load
+        self.exchange_info_lock         = Lock()
+        self.exchange_info_refreshing   = False
+        self.futures_exchange_info_cache    = None  # Same for the futures wallet, loaded on first use
+        self.futures_exchange_info_loaded   = None
+
+        # Symbol Rules Table --> { wallet: { 'source': exchange info symbols, 'symbols': { symbol: entry } } }
+        # see general_get_symbol_entry, rebuilt when the exchange info is reloaded
+        self.symbol_rules       = {}
+        self.symbol_rules_lock  = Lock()
+
+        # Trade Fee Cache --> fees of every symbol, downloaded in one call on first use, p_trade_fee_ttl = None disables it
+        self.trade_fee_ttl          = p_trade_fee_ttl
+        self.trade_fee_cache        = None  # { symbol: { 'maker': Decimal, 'taker': Decimal } }
+        self.trade_fee_loaded       = None  # monotonic() of the last successful load
+        self.trade_fee_lock         = Lock()
+        self.trade_fee_refreshing   = False
+        self.trade_fee_missing      = set() # Symbols a reload didn't find a fee for either, not reloaded for again
+
+        # Prefetch --> thread pool for independent REST calls, created on first use
+        # The workers share self.client and its requests.Session, which is safe for these calls:
+        # - the session's urllib3 pools hand every request its own connection
+        # - the API key header is set once when the Client is built, and the cookie jar locks itself
+        # - client.response is overwritten by every call, nothing reads it (the rate limiter gets each call's own response)
+        # - 6 workers plus the caller and a balance check thread stay under the 10 connections kept per host,
+        #   so no connection is opened only to be thrown away
+        self.prefetch_workers   = 6
+        self.prefetch_executor  = None
+        self.prefetch_lock      = Lock()
+
+        # Build Client --> or reuse p_client, a long-lived python-binance Client (and its HTTP session) shared with the caller
         self.request_timeout    = 20
-        self.client_builded     = self.build_client(p_api_pub_key, p_api_secret_key)
+        if p_client:
+            self.client_builded = ('OK', p_client)
+        else:
+            self.client_builded = self.build_client(p_api_pub_key, p_api_secret_key)
         if self.check_client_build_ok():
             self.client = self.client_builded[1]
 
+        # Profiler --> optional call_profiler.CallProfiler, records time and requests of every method
+        if p_profiler:
+            p_profiler.attach(self)
+
     """""""""""""""""""""
     UTILITY
     """""""""""""""""""""
@@ -58,6 +113,8 @@ class BinanceAPI:
                 _temp = Client( api_key = p_api_pub_key, api_secret = p_api_secret_key, requests_params = { "timeout" : self.request_timeout } )
             else:
                 _temp = Client( requests_params = { "timeout" : self.request_timeout } )
+            if self.rate_limiter:
+                self.rate_limiter.attach(_temp)
             _response_tuple = ('OK', _temp)
         except BinanceAPIException as e:
             _error = str(e).split(":")[1]
@@ -78,18 +135,39 @@ class BinanceAPI:
     def get_client_msg_nok(self):
         return self.client_builded[1]
 
+    # Run independent calls concurrently --> p_calls = { name: (function, args) }, returns { name: response tuple }
+    # Every call runs in a copy of the caller's context, so it keeps eg. its rate_limiter priority
+    def general_prefetch(self, p_calls):
+
+        # Prepare
+        _inputs     = f"{'|'.join(p_calls)}"
+        _futures    = {}
+        _responses  = {}
+
+        with self.prefetch_lock:
+            if self.prefetch_executor is None:
+                self.prefetch_executor = ThreadPoolExecutor(max_workers = self.prefetch_workers, thread_name_prefix = "binance_prefetch")
+
+        for _name, (_function, _args) in p_calls.items():
+            _futures[_name] = self.prefetch_executor.submit(copy_context().run, _function, *_args)
+
+        for _name, _future in _futures.items():
+            try:
+                _responses[_name] = _future.result()
+            except Exception:
+                _responses[_name] = ('NOK',  f"{ utility.my_log('Exception','general_prefetch',_inputs,traceback.format_exc(2))}")
+
+        return(_responses)
+
     # Truncate Asset Qta (p_qta_start) to the largest multiple of p_step_size for LOT_SIZE
     def truncate_by_step_size(self, p_qta_start, p_step_size):
 
         # Prepare
         _inputs             = f"{p_qta_start}|{p_step_size}"
         _response_tuple     = None        
-        _digits_int         = None
         _qta_start_decimal  = None
+        _exponent           = None
         _qta_end            = None
-        
-        # By default rounding setting in python is ROUND_HALF_EVEN
-        getcontext().rounding = ROUND_DOWN
 
         # Convert p_qta_start into Decimal
         try:
@@ -98,16 +176,16 @@ class BinanceAPI:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','truncate_by_step_size',_inputs,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        # Calculate Digits 4 Round
+        # Exponent 4 Quantize --> computed once per step size
         try:
-            _digits_int = int( round( -math.log(Decimal(p_step_size), 10) , 0 ) )
+            _exponent = step_exponent(Decimal(p_step_size))
         except Exception:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','truncate_by_step_size',_inputs,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        # Calculate Tot End
+        # Calculate Tot End --> ROUND_DOWN in a private context, the thread's context is left alone
         try:
-            _qta_end = Decimal(round( _qta_start_decimal , _digits_int ))
+            _qta_end = truncate(_qta_start_decimal, _exponent)
             _response_tuple = ('OK',_qta_end)
         except Exception:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','truncate_by_step_size',_inputs,traceback.format_exc(2))}")
@@ -117,6 +195,79 @@ class BinanceAPI:
     """""""""""""""""""""
     GENERAL ENDPOINTS
     """""""""""""""""""""
+    # Get Exchange Info with Symbols indexed by name, served from cache while younger than exchange_info_ttl
+    def general_get_exchange_info(self):
+
+        # Prepare
+        _response_tuple = None
+        _age            = None
+
+        # No cache --> download it now
+        if self.exchange_info_ttl is None:
+            _response_tuple = self.general_load_exchange_info()
+            return(_response_tuple)
+
+        # First call --> only one thread downloads it, the others wait for its result
+        if self.exchange_info_cache is None:
+            with self.exchange_info_lock:
+                if self.exchange_info_cache is None:
+                    _response_tuple = self.general_load_exchange_info()
+                    return(_response_tuple)
+
+        # Cache too old --> keep serving it while it is refreshed in the background
+        _age = monotonic() - self.exchange_info_loaded
+        if _age > self.exchange_info_ttl:
+            self.general_refresh_exchange_info()
+
+        _response_tuple = ('OK', self.exchange_info_cache)
+
+        return(_response_tuple)
+
+    # Download Exchange Info and index its Symbols by name
+    def general_load_exchange_info(self):
+
+        # Prepare
+        _inputs         = f"{self.exchange_info_ttl}"
+        _response_tuple = None
+        _exchange_info  = None
+        _symbols        = {}
+
+        try:
+            _exchange_info = self.client.get_exchange_info()
+            if _exchange_info:
+                for _symbol_info in _exchange_info.get('symbols'):
+                    _symbols[_symbol_info.get('symbol')] = _symbol_info
+                self.exchange_info_cache    = { 'rateLimits' : _exchange_info.get('rateLimits'), 'symbols' : _symbols }
+                self.exchange_info_loaded   = monotonic()
+                _response_tuple = ('OK', self.exchange_info_cache)
+            else:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_load_exchange_info',_inputs,'_exchange_info is None')}")
+        except BinanceAPIException as e:
+            _error = str(e).split(":")[1]
+            _response_tuple = ('NOK',  _error)
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_load_exchange_info',_inputs,traceback.format_exc(2))}")
+
+        return(_response_tuple)
+
+    # Refresh Exchange Info in a background thread, only one refresh at a time
+    def general_refresh_exchange_info(self):
+
+        with self.exchange_info_lock:
+            if self.exchange_info_refreshing:
+                return
+            self.exchange_info_refreshing = True
+
+        def refresh():
+            try:
+                _response_tuple = self.general_load_exchange_info()
+                if _response_tuple[0] != 'OK':
+                    print(_response_tuple[1])
+            finally:
+                self.exchange_info_refreshing = False
+
+        Thread(target=refresh, name="exchange_info_refresh", daemon=True).start()
+
     # Check if Symbol Exists
     def general_check_if_symbol_exists(self, p_symbol_input = None):
 
@@ -138,7 +289,11 @@ class BinanceAPI:
         # Work
         try:
             # Check
-            _symbol_info = self.client.get_symbol_info(symbol=_symbol_work)
+            _exchange_info = self.general_get_exchange_info()
+            if _exchange_info[0] != 'OK':
+                _response_tuple = ('NOK', _exchange_info[1])
+                return(_response_tuple)
+            _symbol_info = _exchange_info[1].get('symbols').get(_symbol_work)
             if _symbol_info:
                 _response_tuple = ('OK', f"Symbol {_symbol_work} exist")
             else:
@@ -164,9 +319,9 @@ class BinanceAPI:
         try:
 
             # Get Exchange Info
-            _exchange_info = self.client.get_exchange_info()
-            if _exchange_info:
-                _rate_limits = _exchange_info.get('rateLimits')
+            _exchange_info = self.general_get_exchange_info()
+            if _exchange_info[0] == 'OK':
+                _rate_limits = _exchange_info[1].get('rateLimits')
                 if len(_rate_limits) > 0:
 
                     for _rate_limit in _rate_limits:
@@ -192,7 +347,7 @@ class BinanceAPI:
                     _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_rate_limits',_inputs,'_rate_limits is None')}")
 
             else:
-                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_rate_limits',_inputs,'_exchange_info is None')}")
+                _response_tuple = ('NOK',  _exchange_info[1])
 
         except BinanceAPIException as e:
             _error = str(e).split(":")[1]
@@ -229,28 +384,52 @@ class BinanceAPI:
 
         return(_response_tuple)
 
-    # PRICE_FILTER
-    # PERCENT_PRICE
-    # LOT_SIZE      --> It is used for both buy and sell
-    # MIN_NOTIONAL  --> It is used for both buy and sell and it is applied on the symbol_second in the following way: quantity symbol_first * avg price symbol > minNotional of symbol
-    # ICEBERG_PARTS
-    # MARKET_LOT_SIZE
-    # MAX_NUM_ALGO_ORDERS    
-    # MAX_NUM_ORDERS
-    def general_get_symbol_info_filter(self, p_what_filter, p_symbol_input = None):
+    # Get Futures Exchange Info with Symbols indexed by name, served from cache while younger than exchange_info_ttl
+    def general_get_futures_exchange_info(self):
 
-        """ PREPARE """
-        
-        # Defaults
-        _inputs                 = None
-        _response_tuple         = None        
-        _symbol_info            = None
-        _symbol_info_dict       = {} 
-        _symbol_work            = None
-        _filters                = None
-        _filter                 = None        
-        _response_tuple_local   = None
-        _output_local           = {}
+        # Prepare
+        _inputs         = f"{self.exchange_info_ttl}"
+        _response_tuple = None
+        _exchange_info  = None
+        _symbols        = {}
+
+        # Cache still fresh
+        if self.exchange_info_ttl is not None and self.futures_exchange_info_cache is not None:
+            if monotonic() - self.futures_exchange_info_loaded <= self.exchange_info_ttl:
+                _response_tuple = ('OK', self.futures_exchange_info_cache)
+                return(_response_tuple)
+
+        try:
+            _exchange_info = self.client.futures_exchange_info()
+            if _exchange_info and _exchange_info.get('symbols'):
+                for _symbol_info in _exchange_info.get('symbols'):
+                    _symbols[_symbol_info.get('symbol')] = _symbol_info
+                self.futures_exchange_info_cache    = { 'rateLimits' : _exchange_info.get('rateLimits'), 'symbols' : _symbols }
+                self.futures_exchange_info_loaded   = monotonic()
+                _response_tuple = ('OK', self.futures_exchange_info_cache)
+            else:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_futures_exchange_info',_inputs,'_exchange_info[symbols] is None')}")
+        except BinanceAPIException as e:
+            _error = str(e).split(":")[1]
+            _response_tuple = ('NOK',  _error)
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_futures_exchange_info',_inputs,traceback.format_exc(2))}")
+
+        return(_response_tuple)
+
+    # Get Symbol Rules Table Entry --> built from the wallet's exchange info once per refresh, it holds
+    # { 'filters': { filterType: parsed filter }, 'quantizer': quantizer.SymbolQuantizer }
+    def general_get_symbol_entry(self, p_symbol_input = None):
+
+        # Prepare
+        _inputs         = None
+        _response_tuple = None
+        _symbol_work    = None
+        _symbol_info    = None
+        _exchange_info  = None
+        _table          = None
+        _entry          = None
+        _filters        = None
 
         # Choose Symbol
         if not p_symbol_input:
@@ -259,12 +438,66 @@ class BinanceAPI:
             _symbol_work = p_symbol_input
 
         # Set Inputs
-        _inputs = f"{p_what_filter}|{_symbol_work}|{self.wallet}"
+        _inputs = f"{_symbol_work}|{self.wallet}"
+
+        # Wallet Exchange Info --> spot and margin share the same
+        if self.wallet == 'spot' or self.wallet == 'margin':
+            _exchange_info = self.general_get_exchange_info()
+        elif self.wallet == 'futures':
+            _exchange_info = self.general_get_futures_exchange_info()
+        else:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_entry',_inputs,self.wallet+': wallet is unknown')}")
+            return(_response_tuple)
+        if _exchange_info[0] != 'OK':
+            _response_tuple = ('NOK', _exchange_info[1])
+            return(_response_tuple)
+
+        # Work --> a reloaded exchange info comes with a new symbols dict, which starts a new table
+        with self.symbol_rules_lock:
+            _table = self.symbol_rules.get(self.wallet)
+            if _table is None or _table.get('source') is not _exchange_info[1].get('symbols'):
+                _table = { 'source' : _exchange_info[1].get('symbols'), 'symbols' : {} }
+                self.symbol_rules[self.wallet] = _table
+            _entry = _table.get('symbols').get(_symbol_work)
+
+        if _entry is None:
+            _symbol_info = _exchange_info[1].get('symbols').get(_symbol_work)
+            if not _symbol_info:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_entry',_inputs,'_symbol_info is None')}")
+                return(_response_tuple)
+            _filters = self.general_build_symbol_rules(_symbol_work, _symbol_info.get('filters') or [])
+            if _filters[0] != 'OK':
+                _response_tuple = ('NOK', _filters[1])
+                return(_response_tuple)
+            try:
+                _entry = { 'filters' : _filters[1], 'quantizer' : SymbolQuantizer(_symbol_work, _symbol_info.get('filters') or []) }
+            except Exception:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_entry',_inputs,traceback.format_exc(2))}")
+                return(_response_tuple)
+            with self.symbol_rules_lock:
+                _table.get('symbols')[_symbol_work] = _entry
+
+        _response_tuple = ('OK', _entry)
+
+        return(_response_tuple)
+
+    # Parse every filter of a Symbol into Decimals --> { filterType: { f"{filterType}_{key}": value } }
+    def general_build_symbol_rules(self, p_symbol, p_filters):
+
+        """ PREPARE """
+
+        # Defaults
+        _inputs                 = f"{p_symbol}|{self.wallet}"
+        _response_tuple         = None
+        _rules                  = {}
+        _parsers                = None
+        _parsed                 = None
 
         """ FUNCTIONS FOR EVERY FILTER """
 
         # Get PRICE_FILTER info
         def price_filter(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':
                     _output_local["PRICE_FILTER_symbol"]     = _symbol
@@ -273,13 +506,14 @@ class BinanceAPI:
                     _output_local["PRICE_FILTER_tickSize"]   = Decimal(_filter.get('tickSize')) if _filter.get('tickSize') else _filter.get('tickSize')
                     _response_tuple_local = ('OK', _output_local)
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.price_filter',_inputs,self.wallet+': wallet is unknown')}")
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.price_filter',_inputs,self.wallet+': wallet is unknown')}")
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.price_filter',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.price_filter',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get PERCENT_PRICE info
         def percent_price(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':
                     _output_local["PERCENT_PRICE_symbol"] = _symbol                    
@@ -291,13 +525,14 @@ class BinanceAPI:
                     _output_local["PERCENT_PRICE_multiplierDown"]   = Decimal(_filter.get('multiplierDown'))    if _filter.get('multiplierDown')    else _filter.get('multiplierDown')
                     _response_tuple_local = ('OK', _output_local)
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.percent_price',_inputs,self.wallet+': wallet is unknown')}")                    
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.percent_price',_inputs,self.wallet+': wallet is unknown')}")                    
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.percent_price',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.percent_price',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
         
         # Get LOT_SIZE info
         def lot_size(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':                
                     _output_local["LOT_SIZE_symbol"]     = _symbol
@@ -306,13 +541,14 @@ class BinanceAPI:
                     _output_local["LOT_SIZE_stepSize"]   = Decimal(_filter.get('stepSize'))  if _filter.get('stepSize')  else _filter.get('stepSize') # the quantity to buy or sell must be an exact multiple of symbol stepSize
                     _response_tuple_local = ('OK', _output_local)
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.lot_size',_inputs,self.wallet+': wallet is unknown')}")                                
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.lot_size',_inputs,self.wallet+': wallet is unknown')}")                                
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.lot_size',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.lot_size',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get MIN_NOTIONAL info
         def min_notional(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin':                    
                     _output_local["MIN_NOTIONAL_symbol"]         = _symbol
@@ -321,30 +557,32 @@ class BinanceAPI:
                     _output_local["MIN_NOTIONAL_avgPriceMins"]   = int(_filter.get('avgPriceMins')) if _filter.get('avgPriceMins') else _filter.get('avgPriceMins')
                     _response_tuple_local = ('OK', _output_local)
                 elif self.wallet == 'futures':
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.min_notional',_inputs,self.wallet+': attention! for this wallet min_notional does not exist ')}")                                
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.min_notional',_inputs,self.wallet+': attention! for this wallet min_notional does not exist ')}")                                
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.min_notional',_inputs,self.wallet+': wallet is unknown')}")               
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.min_notional',_inputs,self.wallet+': wallet is unknown')}")               
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.min_notional',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.min_notional',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get ICEBERG_PARTS info
         def iceberg_parts(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin':                    
                     _output_local["ICEBERG_PARTS_symbol"]   = _symbol
                     _output_local["ICEBERG_PARTS_limit"]    = int(_filter.get('limit')) if _filter.get('limit') else _filter.get('limit')
                     _response_tuple_local = ('OK', _output_local)
                 elif self.wallet == 'futures':
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.iceberg_parts',_inputs,self.wallet+': attention! for this wallet iceberg_parts does not exist ')}")                                
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.iceberg_parts',_inputs,self.wallet+': attention! for this wallet iceberg_parts does not exist ')}")                                
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.iceberg_parts',_inputs,self.wallet+': wallet is unknown')}")               
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.iceberg_parts',_inputs,self.wallet+': wallet is unknown')}")               
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.iceberg_parts',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.iceberg_parts',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get MARKET_LOT_SIZE info
         def market_lot_size(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':                
                     _output_local["MARKET_LOT_SIZE_symbol"]      = _symbol
@@ -353,13 +591,14 @@ class BinanceAPI:
                     _output_local["MARKET_LOT_SIZE_stepSize"]    = Decimal(_filter.get('stepSize'))  if _filter.get('stepSize')  else _filter.get('stepSize')
                     _response_tuple_local = ('OK', _output_local)
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.market_lot_size',_inputs,self.wallet+': wallet is unknown')}")                    
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.market_lot_size',_inputs,self.wallet+': wallet is unknown')}")                    
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.market_lot_size',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.market_lot_size',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get MAX_NUM_ALGO_ORDERS info
         def max_num_algo_orders(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':
                     _output_local["MAX_NUM_ALGO_ORDERS_symbol"] = _symbol
@@ -369,13 +608,14 @@ class BinanceAPI:
                         _output_local["MAX_NUM_ALGO_ORDERS_limit"] = int(_filter.get('limit')) if _filter.get('limit') else _filter.get('limit')
                     _response_tuple_local = ('OK', _output_local)                                                        
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.max_num_algo_orders',_inputs,self.wallet+': wallet is unknown')}")                    
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.max_num_algo_orders',_inputs,self.wallet+': wallet is unknown')}")                    
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.max_num_algo_orders',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.max_num_algo_orders',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
         # Get MAX_NUM_ORDERS info
         def max_num_orders(_symbol, _filter):
+            _output_local = {}
             try:
                 if self.wallet == 'spot' or self.wallet == 'margin' or self.wallet == 'futures':
                     _output_local["MAX_NUM_ORDERS_symbol"] = _symbol
@@ -385,81 +625,235 @@ class BinanceAPI:
                         _output_local["MAX_NUM_ORDERS_limit"] = int(_filter.get('limit')) if _filter.get('limit') else _filter.get('limit') 
                     _response_tuple_local = ('OK', _output_local)                                                       
                 else:
-                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter.max_num_orders',_inputs,self.wallet+': wallet is unknown')}")                    
+                    _response_tuple_local = ('NOK',  f"{ utility.my_log('Error','general_build_symbol_rules.max_num_orders',_inputs,self.wallet+': wallet is unknown')}")                    
             except Exception:
-                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter.max_num_orders',_inputs,traceback.format_exc(2))}")
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.max_num_orders',_inputs,traceback.format_exc(2))}")
             return(_response_tuple_local)
 
-        """ GET SYMBOL INFO """
-        try:
-            if self.wallet == 'spot' or self.wallet == 'margin':
-                _symbol_info = self.client.get_symbol_info(symbol=_symbol_work)
-            elif self.wallet == 'futures':
-                _symbol_info_dict = self.client.futures_exchange_info()                 
-                if _symbol_info_dict['symbols']:                    
-                    for f in _symbol_info_dict['symbols']:
-                        if f.get('symbol') == _symbol_work:
-                            _symbol_info = f                           
-                            break
-                else:
-                    _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,_symbol_info_dict['symbols']+': _symbol_info_dict[symbols] is None')}")
-                    return(_response_tuple)   
+        # Get any other filter info --> numbers as Decimals, the rest as they are
+        def other_filter(_symbol, _filter):
+            _output_local = {}
+            try:
+                _output_local[f"{_filter.get('filterType')}_symbol"] = _symbol
+                for _key, _value in _filter.items():
+                    if _key != 'filterType':
+                        try:
+                            _output_local[f"{_filter.get('filterType')}_{_key}"] = Decimal(_value) if isinstance(_value, str) else _value
+                        except Exception:
+                            _output_local[f"{_filter.get('filterType')}_{_key}"] = _value
+                _response_tuple_local = ('OK', _output_local)
+            except Exception:
+                _response_tuple_local = ('NOK',  f"{ utility.my_log('Exception','general_build_symbol_rules.other_filter',_inputs,traceback.format_exc(2))}")
+            return(_response_tuple_local)
+
+        """ WORK ON FILTERS """
+
+        # Filters of this wallet
+        _parsers = {
+            'PRICE_FILTER'          : price_filter,
+            'PERCENT_PRICE'         : percent_price,
+            'LOT_SIZE'              : lot_size,
+            'MARKET_LOT_SIZE'       : market_lot_size,
+            'MAX_NUM_ALGO_ORDERS'   : max_num_algo_orders,
+            'MAX_NUM_ORDERS'        : max_num_orders,
+        }
+        if self.wallet == 'spot' or self.wallet == 'margin':
+            _parsers['MIN_NOTIONAL']    = min_notional
+            _parsers['ICEBERG_PARTS']   = iceberg_parts
+
+        for _filter in p_filters:
+            if _filter.get('filterType') in _parsers:
+                _parsed = _parsers.get(_filter.get('filterType'))(p_symbol, _filter)
+            elif self.wallet == 'futures' and (_filter.get('filterType') == 'MIN_NOTIONAL' or _filter.get('filterType') == 'ICEBERG_PARTS'):
+                continue # Asked for, general_get_symbol_info_filter tells this wallet does not have them
             else:
-                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,self.wallet+': wallet is unknown')}")
+                _parsed = other_filter(p_symbol, _filter)
+            if _parsed[0] != 'OK':
+                _response_tuple = ('NOK', _parsed[1])
                 return(_response_tuple)
+            _rules[_filter.get('filterType')] = _parsed[1]
+
+        _response_tuple = ('OK', _rules)
+
+        return(_response_tuple)
+
+    # Get Symbol Rules --> every filter of the Symbol, parsed
+    def general_get_symbol_rules(self, p_symbol_input = None):
+
+        # Prepare
+        _response_tuple = None
+        _entry          = None
+
+        _entry = self.general_get_symbol_entry(p_symbol_input)
+        if _entry[0] != 'OK':
+            _response_tuple = ('NOK', _entry[1])
+            return(_response_tuple)
+
+        _response_tuple = ('OK', _entry[1].get('filters'))
+
+        return(_response_tuple)
+
+    # PRICE_FILTER
+    # PERCENT_PRICE
+    # LOT_SIZE      --> It is used for both buy and sell
+    # MIN_NOTIONAL  --> It is used for both buy and sell and it is applied on the symbol_second in the following way: quantity symbol_first * avg price symbol > minNotional of symbol
+    # ICEBERG_PARTS
+    # MARKET_LOT_SIZE
+    # MAX_NUM_ALGO_ORDERS    
+    # MAX_NUM_ORDERS
+    # Any other filter comes with its keys as they are, f"{p_what_filter}_{key}", numbers as Decimals
+    # The dict returned is shared by every caller, do not modify it
+    def general_get_symbol_info_filter(self, p_what_filter, p_symbol_input = None):
+
+        # Prepare
+        _inputs         = None
+        _response_tuple = None
+        _symbol_work    = None
+        _rules          = None
+
+        # Choose Symbol
+        if not p_symbol_input:
+            _symbol_work = self.symbol
+        else:
+            _symbol_work = p_symbol_input
+
+        # Set Inputs
+        _inputs = f"{p_what_filter}|{_symbol_work}|{self.wallet}"
+
+        # Rules Table
+        _rules = self.general_get_symbol_rules(_symbol_work)
+        if _rules[0] != 'OK':
+            _response_tuple = ('NOK', _rules[1])
+            return(_response_tuple)
+
+        # Filter
+        if p_what_filter in _rules[1]:
+            _response_tuple = ('OK', _rules[1].get(p_what_filter))
+        elif self.wallet == 'futures' and (p_what_filter == 'MIN_NOTIONAL' or p_what_filter == 'ICEBERG_PARTS'):
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,self.wallet+': attention! for this wallet '+p_what_filter.lower()+' does not exist ')}")
+        else:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,p_what_filter+': what_filter is unknown')}")
+
+        return(_response_tuple)
+
+    # Get Trade Fees of every Symbol, served from cache while younger than trade_fee_ttl
+    def general_get_trade_fees(self):
+
+        # Prepare
+        _response_tuple = None
+        _age            = None
+
+        # No cache --> download them now
+        if self.trade_fee_ttl is None:
+            _response_tuple = self.general_load_trade_fees()
+            return(_response_tuple)
+
+        # First call or invalidated --> only one thread downloads them, the others wait for its result
+        if self.trade_fee_cache is None:
+            with self.trade_fee_lock:
+                if self.trade_fee_cache is None:
+                    _response_tuple = self.general_load_trade_fees()
+                    return(_response_tuple)
+
+        # Cache too old --> keep serving it while it is refreshed in the background
+        _age = monotonic() - self.trade_fee_loaded
+        if _age > self.trade_fee_ttl:
+            self.general_refresh_trade_fees()
+
+        _response_tuple = ('OK', self.trade_fee_cache)
+
+        return(_response_tuple)
+
+    # Download the Trade Fees of every Symbol in one call and index them by Symbol
+    def general_load_trade_fees(self):
+
+        # Prepare
+        _inputs             = f"{self.trade_fee_ttl}"
+        _response_tuple     = None
+        _trade_fee_response = None
+        _trade_fee          = None
+        _fees               = {}
+
+        try:
+            _trade_fee_response = self.client.get_trade_fee()
+
+            # /sapi/v1/asset/tradeFee answers a list, the old /wapi/v3/tradeFee.html a dict
+            if isinstance(_trade_fee_response, dict):
+                if not _trade_fee_response.get('success'):
+                    _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_load_trade_fees',_inputs,'get_trade_fee() insuccess')}")
+                    return(_response_tuple)
+                _trade_fee = _trade_fee_response.get('tradeFee')
+            else:
+                _trade_fee = _trade_fee_response
+
+            if _trade_fee:
+                for t in _trade_fee:
+                    _fees[t.get('symbol')] = {
+                        'maker' : Decimal(t.get('makerCommission', t.get('maker'))),
+                        'taker' : Decimal(t.get('takerCommission', t.get('taker'))),
+                    }
+                self.trade_fee_cache    = _fees
+                self.trade_fee_loaded   = monotonic()
+                _response_tuple = ('OK', self.trade_fee_cache)
+            else:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_load_trade_fees',_inputs,'_trade_fee is Empty')}")
         except BinanceAPIException as e:
             _error = str(e).split(":")[1]
             _response_tuple = ('NOK',  _error)
-            return(_response_tuple)
         except Exception:
-            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_info_filter',_inputs,traceback.format_exc(2))}")
-            return(_response_tuple)
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_load_trade_fees',_inputs,traceback.format_exc(2))}")
 
-        """ WORK ON SYMBOL INFO """
-        if _symbol_info:
-            _filters = _symbol_info.get('filters')
-            if len(_filters) > 0:
-                for _filter in _filters:
-                                        
-                    if _filter.get('filterType') == p_what_filter:
+        return(_response_tuple)
 
-                        if p_what_filter == 'PRICE_FILTER':
-                            _response_tuple = price_filter(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'PERCENT_PRICE':
-                            _response_tuple = percent_price(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'LOT_SIZE':
-                            _response_tuple = lot_size(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'MIN_NOTIONAL':                            
-                            _response_tuple = min_notional(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'ICEBERG_PARTS':
-                            _response_tuple = iceberg_parts(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'MARKET_LOT_SIZE':
-                            _response_tuple = market_lot_size(_symbol_work, _filter)
-                            break
-                        elif p_what_filter == 'MAX_NUM_ALGO_ORDERS':
-                            _response_tuple = max_num_algo_orders(_symbol_work, _filter)
-                            break                            
-                        elif p_what_filter == 'MAX_NUM_ORDERS':
-                            _response_tuple = max_num_orders(_symbol_work, _filter)
-                            break
-                        else:                          
-                            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,p_what_filter+': what_filter is unknown')}")
+    # Refresh Trade Fees in a background thread, only one refresh at a time
+    def general_refresh_trade_fees(self):
 
-                    else:                          
-                        _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,p_what_filter+': what_filter is unknown')}")
-            else:
-                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,'_filters is None')}")
+        with self.trade_fee_lock:
+            if self.trade_fee_refreshing:
+                return
+            self.trade_fee_refreshing = True
 
-        else:
-            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_info_filter',_inputs,'_symbol_info is None')}")
+        def refresh():
+            try:
+                _response_tuple = self.general_load_trade_fees()
+                if _response_tuple[0] != 'OK':
+                    print(_response_tuple[1])
+            finally:
+                self.trade_fee_refreshing = False
+
+        Thread(target=refresh, name="trade_fee_refresh", daemon=True).start()
+
+    # Reload Trade Fees for an existing Symbol missing from the cache --> eg. listed after the last load
+    # Only one thread reloads, the others waiting on the lock get its result, and each Symbol is only reloaded for once
+    # p_trade_fees --> the Trade Fees the Symbol was looked up in, as general_get_trade_fees returned them. Every load
+    # builds a new dict, so it is still the cache only if no other thread has reloaded since
+    def general_reload_trade_fees(self, p_symbol, p_trade_fees):
+
+        # Prepare
+        _response_tuple = None
+
+        with self.trade_fee_lock:
+            if p_symbol in self.trade_fee_missing:
+                _response_tuple = ('OK', self.trade_fee_cache)
+                return(_response_tuple)
+
+            # Not reloaded by another thread since the cache was read, or invalidated since --> reload now
+            if self.trade_fee_cache is None or self.trade_fee_cache is p_trade_fees:
+                _response_tuple = self.general_load_trade_fees()
+                if _response_tuple[0] != 'OK':
+                    return(_response_tuple)
+
+            if p_symbol not in self.trade_fee_cache:
+                self.trade_fee_missing.add(p_symbol)
+            _response_tuple = ('OK', self.trade_fee_cache)
 
         return(_response_tuple)
 
+    # Invalidate Trade Fees --> eg. after a VIP level or BNB discount change, the next lookup downloads them again
+    def general_invalidate_trade_fees(self):
+        self.trade_fee_cache = None
+        self.trade_fee_missing = set()
+
     # Get Symbol Fee Cost
     # https://binance.zendesk.com/hc/en-us/articles/360007720071-Maker-vs-Taker
     def general_get_symbol_fee_cost(self, p_what_fee='taker', p_symbol_input = None):
@@ -468,9 +862,8 @@ class BinanceAPI:
         _inputs             = None 
         _response_tuple     = None               
         _fee_decimal        = None
-        _trade_fee_response = None
+        _trade_fees         = None
         _symbol_exists      = None
-        _trade_fee          = {}
         _symbol_work        = None
 
         # Choose Symbol
@@ -482,41 +875,32 @@ class BinanceAPI:
         # Set Inputs
         _inputs = f"{_symbol_work}|{p_what_fee}"
 
-        # Check if Symbol Exists
-        _symbol_exists  = self.general_check_if_symbol_exists(_symbol_work)
-        if _symbol_exists[0] == 'NOK':
-            _response_tuple = (_symbol_exists[0], _symbol_exists[1])
+        # Get Trade Fees --> from cache
+        _trade_fees = self.general_get_trade_fees()
+        if _trade_fees[0] != 'OK':
+            _response_tuple = ('NOK', _trade_fees[1])
             return(_response_tuple)
 
-        try:
-            # Get Trade Fee Response
-            _trade_fee_response = self.client.get_trade_fee(symbol=_symbol_work)
-
-            # Work on Trade Fee Response
-            if _trade_fee_response:
-                if (_trade_fee_response.get('success')):
-                    _trade_fee = _trade_fee_response.get('tradeFee')
-                    if len(_trade_fee) > 0: # Checking if dictionary _trade_fee is empty
-                        for t in _trade_fee:
-                            if t.get('symbol') == _symbol_work:
-                                try:
-                                    _fee_decimal = Decimal(t.get(p_what_fee))
-                                    _response_tuple = ('OK', _fee_decimal)
-                                except Exception:
-                                    _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_fee_cost',_inputs,traceback.format_exc(2))}")
-                                    return(_response_tuple)
-                    else:
-                        _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_fee_cost',_inputs,'_trade_fee is Empty')}")
-                else:
-                    _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_fee_cost',_inputs,'get_trade_fee() insuccess')}")
-            else:
-                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_fee_cost',_inputs,'_trade_fee_response is None')}")
+        # Symbol without a fee --> check if it Exists, and if it does reload the Trade Fees once
+        if _symbol_work not in _trade_fees[1]:
+            _symbol_exists  = self.general_check_if_symbol_exists(_symbol_work)
+            if _symbol_exists[0] == 'NOK':
+                _response_tuple = (_symbol_exists[0], _symbol_exists[1])
+                return(_response_tuple)
+            _trade_fees = self.general_reload_trade_fees(_symbol_work, _trade_fees[1])
+            if _trade_fees[0] != 'OK':
+                _response_tuple = ('NOK', _trade_fees[1])
+                return(_response_tuple)
 
-        except BinanceAPIException as e:
-            _error = str(e).split(":")[1]
-            _response_tuple = ('NOK',  _error)
-        except Exception:
-            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_symbol_fee_cost',_inputs,traceback.format_exc(2))}")
+        # Work
+        if _symbol_work in _trade_fees[1]:
+            _fee_decimal = _trade_fees[1].get(_symbol_work).get(p_what_fee)
+            if _fee_decimal is not None:
+                _response_tuple = ('OK', _fee_decimal)
+            else:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_fee_cost',_inputs,p_what_fee+': what_fee is unknown')}")
+        else:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_symbol_fee_cost',_inputs,'_trade_fee is Empty')}")
 
         return(_response_tuple)
 
@@ -564,6 +948,32 @@ class BinanceAPI:
 
         return(_response_tuple)
 
+    # Get Last Price of every Symbol with a single request
+    def general_get_price_snapshot(self):
+
+        # Prepare
+        _inputs             = None
+        _response_tuple     = None
+        _tickers_response   = None
+        _prices             = {}
+
+        try:
+            _tickers_response = self.client.get_all_tickers()
+            if _tickers_response:
+                for _ticker in _tickers_response:
+                    _prices[_ticker.get('symbol')] = Decimal(_ticker.get('price'))
+                _response_tuple = ('OK', _prices)
+            else:
+                _response_tuple = ('NOK',  f"{ utility.my_log('Error','general_get_price_snapshot',_inputs,'_tickers_response is None')}")
+
+        except BinanceAPIException as e:
+            _error = str(e).split(":")[1]
+            _response_tuple = ('NOK',  _error)
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','general_get_price_snapshot',_inputs,traceback.format_exc(2))}")
+
+        return(_response_tuple)
+
     # Get Mark Price - only Futures
     def general_get_symbol_mark_price(self, p_symbol_input = None):
 
@@ -616,10 +1026,14 @@ class BinanceAPI:
     """ GENERIC """
 
     # Get Account Balance Total (free & locked) --> spot + margin
-    def account_get_balance_total(self):
+    # p_price_snapshot = True --> value every asset from one bulk last price snapshot instead of one avg price request per symbol
+    # p_vectorized = 'exact' or 'float' --> with p_price_snapshot and numpy installed, value the assets with array operations
+    # p_account_info & p_prices --> Account Info and {symbol: price} already fetched by the caller (eg. with an async client),
+    # no request is made and p_prices is used like a price snapshot, see account_get_balance_symbols for what to price
+    def account_get_balance_total(self, p_price_snapshot = False, p_vectorized = None, p_account_info = None, p_prices = None):
 
         # Prepare
-        _inputs             = f"{self.wallet}"
+        _inputs             = f"{self.wallet}|{p_price_snapshot}|{p_vectorized}|{p_account_info is not None}|{p_prices is not None}"
         _response_tuple     = None                
         _my_balance         = []
         _my_asset           = {}
@@ -639,18 +1053,38 @@ class BinanceAPI:
         _tot_btc            = 0
         _tot_usd            = 0
 
+        _price_snapshot     = None
+
+        # Get Price for the valuation, from the snapshot if there is one
+        def get_price(_symbol):
+            if _price_snapshot is not None:
+                if _symbol in _price_snapshot:
+                    return(('OK', _price_snapshot[_symbol]))
+                return(('NOK', f"Symbol {_symbol} does not exist"))
+            return(self.general_get_symbol_avg_price(_symbol))
+
         try:
                                     
-            # Get Account Info
+            # Get Account Info, unless the caller already did
             if self.wallet == 'spot':
-                _account_info   = self.client.get_account()
+                _account_info   = self.client.get_account() if p_account_info is None else p_account_info
                 _what_finds     = "balances"
             elif self.wallet == 'margin':
-                _account_info   = self.client.get_margin_account()
+                _account_info   = self.client.get_margin_account() if p_account_info is None else p_account_info
                 _what_finds     = "userAssets"
             elif self.wallet == 'futures':
                 _what_finds     = 'no_what_finds'
-                _account_info   = self.client.futures_account_balance()
+                _account_info   = self.client.futures_account_balance() if p_account_info is None else p_account_info
+
+            # Get Price Snapshot, unless the caller already did
+            if p_prices is not None:
+                _price_snapshot = p_prices
+            elif p_price_snapshot and self.wallet != 'futures':
+                _price_snapshot_response = self.general_get_price_snapshot()
+                if _price_snapshot_response[0] != 'OK':
+                    _response_tuple = ('NOK', _price_snapshot_response[1])
+                    return(_response_tuple)
+                _price_snapshot = _price_snapshot_response[1]
         
         except BinanceAPIException as e:
             _error = str(e).split(":")[1]
@@ -658,6 +1092,10 @@ class BinanceAPI:
         except Exception:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_balance_total',_inputs,traceback.format_exc(2))}") 
                 
+        # Vectorized Valuation
+        if p_vectorized and numpy is not None and _price_snapshot is not None and _response_tuple is None and _what_finds in _account_info:
+            return(self.account_get_balance_total_vectorized(_account_info[_what_finds], _price_snapshot, p_vectorized == 'exact'))
+
         # Get Values from Account Info
         if _what_finds in _account_info:
             
@@ -688,7 +1126,7 @@ class BinanceAPI:
                         _tot_btc_locked = _tot_btc_locked + _my_asset.get('locked')
                         
                         # Tot Usd
-                        _avg_price_temp = self.general_get_symbol_avg_price('BTCUSDT')
+                        _avg_price_temp = get_price('BTCUSDT')
                         if _avg_price_temp[0] == 'OK':
                             _tot_usd_free   = _tot_usd_free + (_avg_price_temp[1] * _my_asset.get('free'))
                             _tot_usd_locked = _tot_usd_locked + (_avg_price_temp[1] * _my_asset.get('locked'))
@@ -700,7 +1138,7 @@ class BinanceAPI:
                     elif _my_asset.get('asset') == 'USDT':
                         
                         # Tot Btc
-                        _avg_price_temp = self.general_get_symbol_avg_price('BTCUSDT')
+                        _avg_price_temp = get_price('BTCUSDT')
                         if _avg_price_temp[0] == 'OK':
                             _tot_btc_free   = _tot_btc_free + (_my_asset.get('free') / _avg_price_temp[1])
                             _tot_btc_locked = _tot_btc_locked + (_my_asset.get('locked') / _avg_price_temp[1])
@@ -716,7 +1154,7 @@ class BinanceAPI:
                     elif _my_asset.get('asset') == 'BUSD':
 
                         # Tot Btc
-                        _avg_price_temp = self.general_get_symbol_avg_price('BTCBUSD')
+                        _avg_price_temp = get_price('BTCBUSD')
                         if _avg_price_temp[0] == 'OK':
                             _tot_btc_free   = _tot_btc_free + (_my_asset.get('free') / _avg_price_temp[1])
                             _tot_btc_locked = _tot_btc_locked + (_my_asset.get('locked') / _avg_price_temp[1])
@@ -736,7 +1174,7 @@ class BinanceAPI:
                         _symbol_temp_usdt   = f"{_my_asset.get('asset')}USDT"
 
                         # Tot Btc
-                        _avg_price_temp_btc = self.general_get_symbol_avg_price(_symbol_temp_btc)
+                        _avg_price_temp_btc = get_price(_symbol_temp_btc)
                         if _avg_price_temp_btc[0] == 'OK':
                             _tot_btc_free   = _tot_btc_free + (_avg_price_temp_btc[1] * _my_asset.get('free'))
                             _tot_btc_locked = _tot_btc_locked + (_avg_price_temp_btc[1] * _my_asset.get('locked'))                            
@@ -750,7 +1188,7 @@ class BinanceAPI:
                         """
                         
                         # Tot Usd    
-                        _avg_price_temp_usdt = self.general_get_symbol_avg_price(_symbol_temp_usdt)
+                        _avg_price_temp_usdt = get_price(_symbol_temp_usdt)
                         if _avg_price_temp_usdt[0] == 'OK':
                             _tot_usd_free   = _tot_usd_free + (_avg_price_temp_usdt[1] * _my_asset.get('free'))
                             _tot_usd_locked = _tot_usd_locked + (_avg_price_temp_usdt[1] * _my_asset.get('locked'))
@@ -816,6 +1254,129 @@ class BinanceAPI:
 
         return(_response_tuple)
 
+    # Get the Symbols account_get_balance_total prices an Account Info with --> spot + margin
+    # For a caller that fetches Account Info and prices itself (eg. with an async client), only Symbols that exist are listed
+    def account_get_balance_symbols(self, p_account_info):
+
+        # Prepare
+        _inputs             = f"{self.wallet}"
+        _response_tuple     = None
+        _what_finds         = "userAssets" if self.wallet == 'margin' else "balances"
+        _exchange_info      = None
+        _asset              = None
+        _candidates         = None
+        _symbol_work        = None
+        _symbols            = []
+
+        # Exchange Info to check the Symbols with
+        _exchange_info = self.general_get_exchange_info()
+        if _exchange_info[0] != 'OK':
+            _response_tuple = ('NOK', _exchange_info[1])
+            return(_response_tuple)
+
+        try:
+            # Same Symbols account_get_balance_total asks a price for, per Asset with something
+            for _what_find in p_account_info.get(_what_finds):
+                if ( Decimal(_what_find.get('free')) + Decimal(_what_find.get('locked')) ) > 0:
+                    _asset = _what_find.get('asset')
+                    if _asset in ('BTC', 'USDT'):
+                        _candidates = ['BTCUSDT']
+                    elif _asset == 'BUSD':
+                        _candidates = ['BTCBUSD']
+                    else:
+                        _candidates = [f"{_asset}BTC", f"{_asset}USDT"]
+                    for _symbol_work in _candidates:
+                        if _symbol_work not in _symbols and _symbol_work in _exchange_info[1].get('symbols'):
+                            _symbols.append(_symbol_work)
+            _response_tuple = ('OK', _symbols)
+
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_balance_symbols',_inputs,traceback.format_exc(2))}")
+
+        return(_response_tuple)
+
+    # Get Account Balance Total from a Price Snapshot with array operations --> spot + margin, needs numpy
+    # Same result as account_get_balance_total, p_exact = True keeps every amount a Decimal so the totals match it exactly,
+    # p_exact = False works in float64 and only converts the totals back to Decimal
+    def account_get_balance_total_vectorized(self, p_balances, p_price_snapshot, p_exact = False):
+
+        # Prepare
+        _inputs             = f"{self.wallet}|{len(p_balances)}|{p_exact}"
+        _response_tuple     = None
+        _my_balance         = []
+        _held               = None
+        _error_symbol       = None
+        _one                = Decimal(1)
+        _zero               = Decimal(0)
+        _btc_usdt           = p_price_snapshot.get('BTCUSDT')
+        _btc_busd           = p_price_snapshot.get('BTCBUSD')
+
+        # Multipliers from an Asset amount to its BTC & USD value --> ( btc multiplier, btc divisor, usd multiplier, missing symbol )
+        def get_rates(_asset):
+            if _asset == 'BTC':
+                return( (_one, _one, _btc_usdt or _zero, None if _btc_usdt else 'BTCUSDT') )
+            if _asset == 'USDT':
+                return( (_one if _btc_usdt else _zero, _btc_usdt or _one, _one, None if _btc_usdt else 'BTCUSDT') )
+            if _asset == 'BUSD':
+                return( (_one if _btc_busd else _zero, _btc_busd or _one, _one, None if _btc_busd else 'BTCBUSD') )
+            # Altcoin --> a missing pair just isn't counted, eg. LDDOT from Savings
+            return( (p_price_snapshot.get(f"{_asset}BTC", _zero), _one, p_price_snapshot.get(f"{_asset}USDT", _zero), None) )
+
+        try:
+
+            # Only Asset with something --> filtered on float arrays, Decimals are only built for what is held
+            _free_float     = numpy.array([ _what_find.get('free') for _what_find in p_balances ], dtype = float)
+            _locked_float   = numpy.array([ _what_find.get('locked') for _what_find in p_balances ], dtype = float)
+            _held           = numpy.flatnonzero( (_free_float + _locked_float) > 0 )
+
+            # Build List Assets Dict
+            for _position in _held:
+                _what_find = p_balances[_position]
+                _my_balance.append( {   'asset'     : _what_find.get('asset'),
+                                        'free'      : Decimal(_what_find.get('free')),
+                                        'locked'    : Decimal(_what_find.get('locked'))    } )
+
+            # Rates per Asset
+            _rates          = [ get_rates(_my_asset.get('asset')) for _my_asset in _my_balance ]
+            _dtype          = object if p_exact else float
+            _btc_mul        = numpy.array([ _rate[0] for _rate in _rates ], dtype = _dtype)
+            _btc_div        = numpy.array([ _rate[1] for _rate in _rates ], dtype = _dtype)
+            _usd_mul        = numpy.array([ _rate[2] for _rate in _rates ], dtype = _dtype)
+            if p_exact:
+                _free       = numpy.array([ _my_asset.get('free') for _my_asset in _my_balance ], dtype = object)
+                _locked     = numpy.array([ _my_asset.get('locked') for _my_asset in _my_balance ], dtype = object)
+            else:
+                _free       = _free_float[_held]
+                _locked     = _locked_float[_held]
+
+            # Estimated TOT Value BTC & USD
+            _sums = [ ( _free * _btc_mul / _btc_div ).sum(), ( _locked * _btc_mul / _btc_div ).sum(),
+                      ( _free * _usd_mul ).sum(),            ( _locked * _usd_mul ).sum() ]
+            if p_exact:
+                _sums = [ _sum if _my_balance else _zero for _sum in _sums ]
+            else:
+                _sums = [ Decimal(repr(float(_sum))) for _sum in _sums ]
+            _tot_btc_free, _tot_btc_locked, _tot_usd_free, _tot_usd_locked = _sums
+
+            # Like the loop, the response follows the last Asset valued
+            if _rates:
+                _error_symbol = _rates[-1][3]
+            if _error_symbol:
+                _response_tuple = ('NOK', f"Symbol {_error_symbol} does not exist")
+            else:
+                _my_balance.insert( 0 , { 'totals' : {  'tot_btc_free': _tot_btc_free,
+                                                        'tot_btc_locked': _tot_btc_locked,
+                                                        'tot_usd_free': _tot_usd_free,
+                                                        'tot_usd_locked': _tot_usd_locked,
+                                                        'tot_btc': _tot_btc_free + _tot_btc_locked,
+                                                        'tot_usd': _tot_usd_free + _tot_usd_locked   }   }   )
+                _response_tuple = ('OK', _my_balance)
+
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_balance_total_vectorized',_inputs,traceback.format_exc(2))}")
+
+        return(_response_tuple)
+
     # Get Account Balance Asset Free  --> spot + margin + futures
     def account_get_balance_asset_free(self, p_symbol):
 
@@ -893,6 +1454,8 @@ class BinanceAPI:
         _symbol_bal_second_free             = None
         _symbol_bal_second_tot_estimated    = None
         _symbol_lot_size                    = None        
+        _symbol_quantizer                   = None
+        _symbol_entry                       = None
         _symbol_step_size_value             = None
         _symbol_min_qty_value               = None
         _symbol_min_notional                = None
@@ -902,6 +1465,8 @@ class BinanceAPI:
         _symbol_fee                         = None 
         _symbol_fee_value                   = None                        
         _symbol_fee_perc                    = None
+        _calls                              = None
+        _prefetched                         = None
 
         # Prepare Quantity Vars
         quantity_pre_size_applied       = None
@@ -910,11 +1475,20 @@ class BinanceAPI:
         quantity_post_stepSize_applied  = None
         quantity_processed_final        = None
 
-        # By default rounding setting in python is ROUND_HALF_EVEN
-        getcontext().rounding = ROUND_DOWN
+        """ Prefetch --> the inputs below don't depend on each other, so they are fetched concurrently """
+        _calls = {
+            'bal_second_free'   : (self.account_get_balance_asset_free, (self.symbol_second,)),
+            'symbol_entry'      : (self.general_get_symbol_entry, ()),
+            'symbol_fee'        : (self.general_get_symbol_fee_cost, (p_what_fee,)),
+        }
+        if p_how2get_qta2buy == 'total':
+            _calls['bal_second_tot_estimated'] = (self.account_get_balance_total, ())
+        if p_type == 'market':
+            _calls['symbol_price'] = (self.general_get_symbol_avg_price, ())
+        _prefetched = self.general_prefetch(_calls)
 
         """ Get Owned Second Asset Balance Free """
-        _symbol_bal_second_free = self.account_get_balance_asset_free(self.symbol_second)
+        _symbol_bal_second_free = _prefetched.get('bal_second_free')
         if _symbol_bal_second_free[0] != 'OK':        
             _response_tuple = ('NOK', _symbol_bal_second_free[1])
             return(_response_tuple)
@@ -923,7 +1497,7 @@ class BinanceAPI:
         if p_how2get_qta2buy == 'total':
 
             # Symbol Bal Second TOT Estimated Asset Balance
-            _symbol_bal_second_tot_estimated = self.account_get_balance_total()
+            _symbol_bal_second_tot_estimated = _prefetched.get('bal_second_tot_estimated')
             if _symbol_bal_second_tot_estimated[0] == 'OK':
                 pass
                 # DA RIVEVEDERE PERCHÈ CON SELF.SYMBOL_SECOND = USDT NON FUNZIONEREBBE
@@ -938,16 +1512,14 @@ class BinanceAPI:
             quantity_pre_size_applied = _symbol_bal_second_free[1]
 
         """ Build bal to use & size """
-        # I break down the formula quantity_post_size_applied = round(Decimal(quantity_pre_size_applied) / Decimal(100) *  Decimal(p_size), 5)
-        # into elementary steps
+        # I break down the formula quantity_post_size_applied = truncate(Decimal(quantity_pre_size_applied) / Decimal(100) *  Decimal(p_size), 5 decimals)
+        # into elementary steps, all of them ROUND_DOWN in a local context so the thread's context is left alone
 
         # Default Value
         _p_size_str = None
         _p_size_decimal = None
         _quantity_pre_size_applied_decimal = None
-        _100_int = 100
-        _100_str = None
-        _100_decimal = None
+        _100_decimal = Decimal(100)
         _division = None
         _multiplication = None        
         _inputs_temp = None
@@ -961,15 +1533,6 @@ class BinanceAPI:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs+_inputs_temp,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        # Prepare 100 ( str -> decimal )
-        _100_str = str(_100_int)
-        try:
-            _100_decimal = Decimal(_100_str)
-        except Exception:
-            _inputs_temp = f"||{type(_100_int)},{_100_int}|{type(_100_str)},{_100_str}|{type(_100_decimal)},{_100_decimal}"            
-            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs+_inputs_temp,traceback.format_exc(2))}")
-            return(_response_tuple)
-
         # Prepare quantity_pre_size_applied
         try:            
             _quantity_pre_size_applied_decimal = Decimal(quantity_pre_size_applied)
@@ -980,7 +1543,8 @@ class BinanceAPI:
 
         # Operate Division
         try:
-            _division = _quantity_pre_size_applied_decimal / _100_decimal
+            with localcontext(TRUNCATE_CONTEXT):
+                _division = _quantity_pre_size_applied_decimal / _100_decimal
         except Exception:
             _inputs_temp = f"||{type(_100_decimal)},{_100_decimal}|{type(_quantity_pre_size_applied_decimal)},{_quantity_pre_size_applied_decimal}|{type(_division)},{_division}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs+_inputs_temp,traceback.format_exc(2))}")
@@ -988,7 +1552,8 @@ class BinanceAPI:
         
         # Operate Multiplication
         try:                 
-            _multiplication = _division * _p_size_decimal
+            with localcontext(TRUNCATE_CONTEXT):
+                _multiplication = _division * _p_size_decimal
         except Exception:
             _inputs_temp = f"||{type(_p_size_decimal)},{_p_size_decimal}|{type(_division)},{_division}|{type(_multiplication)},{_multiplication}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs,traceback.format_exc(2))}")
@@ -996,7 +1561,7 @@ class BinanceAPI:
         
         # Operate Round
         try:             
-            quantity_post_size_applied = round(_multiplication, 5)
+            quantity_post_size_applied = truncate(_multiplication, SIZE_EXPONENT)
         except Exception:
             _inputs_temp = f"||{type(_multiplication)},{_multiplication}|{type(quantity_post_size_applied)},{quantity_post_size_applied}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs+_inputs_temp,traceback.format_exc(2))}")
@@ -1012,27 +1577,27 @@ class BinanceAPI:
             return(_response_tuple)
                                                 
 
-        """ Get Symbol Filter LOT_SIZE """
-        _symbol_lot_size = self.general_get_symbol_info_filter('LOT_SIZE')
-        if _symbol_lot_size[0] != 'OK':
-            _response_tuple = ('NOK',  _symbol_lot_size[1])
-            return(_response_tuple)                    
-
-        """ Get Symbol Filter MIN_NOTIONAL """
-        _symbol_min_notional = self.general_get_symbol_info_filter('MIN_NOTIONAL')
-        if _symbol_min_notional[0] != 'OK':
-            _response_tuple = ('NOK', _symbol_min_notional[1])
+        """ Get Symbol Rules --> LOT_SIZE, MIN_NOTIONAL and the quantizer in one lookup """
+        _symbol_entry = _prefetched.get('symbol_entry')
+        if _symbol_entry[0] != 'OK':
+            _response_tuple = ('NOK',  _symbol_entry[1])
+            return(_response_tuple)
+        _symbol_lot_size        = _symbol_entry[1].get('filters').get('LOT_SIZE')
+        _symbol_min_notional    = _symbol_entry[1].get('filters').get('MIN_NOTIONAL')
+        _symbol_quantizer       = _symbol_entry[1].get('quantizer')
+        if not _symbol_lot_size or not _symbol_min_notional:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','account_get_quantity_to_buy',_inputs,'LOT_SIZE or MIN_NOTIONAL filter is missing')}")
             return(_response_tuple)
 
         """ Get Symbol Fee Cost """
-        _symbol_fee = self.general_get_symbol_fee_cost(p_what_fee)
+        _symbol_fee = _prefetched.get('symbol_fee')
         if _symbol_fee[0] != 'OK':
             _response_tuple = ('NOK',  _symbol_fee[1])
             return(_response_tuple)
 
         """ Get Symbol Avg Price or Symbol Input Price """
         if p_type == 'market':
-            _symbol_price = self.general_get_symbol_avg_price() # Avg Price
+            _symbol_price = _prefetched.get('symbol_price') # Avg Price
             if _symbol_price[0] != 'OK':
                 _response_tuple = ('NOK',  _symbol_price[1])
                 return(_response_tuple)
@@ -1049,27 +1614,28 @@ class BinanceAPI:
 
         """ Calculate Quantity End """
         
-        _symbol_min_qty_value          = _symbol_lot_size[1].get('LOT_SIZE_minQty')        
-        _symbol_step_size_value        = _symbol_lot_size[1].get('LOT_SIZE_stepSize')
-        _symbol_min_notional_value     = _symbol_min_notional[1].get('MIN_NOTIONAL_minNotional')
+        _symbol_min_qty_value          = _symbol_lot_size.get('LOT_SIZE_minQty')        
+        _symbol_step_size_value        = _symbol_lot_size.get('LOT_SIZE_stepSize')
+        _symbol_min_notional_value     = _symbol_min_notional.get('MIN_NOTIONAL_minNotional')
         _symbol_fee_value              = _symbol_fee[1]
         _symbol_price_value            = _symbol_price[1]
         
         # Fee % Applied
         try:
-            _symbol_fee_perc                = (Decimal(100) - _symbol_fee_value) / Decimal(100)
-            quantity_pre_stepSize_applied   = (quantity_post_size_applied / _symbol_price_value) * _symbol_fee_perc
+            with localcontext(TRUNCATE_CONTEXT):
+                _symbol_fee_perc                = (Decimal(100) - _symbol_fee_value) / Decimal(100)
+                quantity_pre_stepSize_applied   = (quantity_post_size_applied / _symbol_price_value) * _symbol_fee_perc
         except Exception:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        # Truncate By Step Size
-        quantity_post_stepSize_applied = self.truncate_by_step_size(quantity_pre_stepSize_applied, _symbol_step_size_value)
-        if quantity_post_stepSize_applied[0] != 'OK':
-            _msg                = quantity_post_stepSize_applied[1]
-            _response_tuple = ('NOK',  f"{ utility.my_log('Error','account_get_quantity_to_buy',_inputs,_msg)}")
+        # Truncate By Step Size --> MARKET_LOT_SIZE for market orders
+        try:
+            quantity_post_stepSize_applied = _symbol_quantizer.quantity(quantity_pre_stepSize_applied, p_type == 'market')
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_buy',_inputs,traceback.format_exc(2))}")
             return(_response_tuple)
-        quantity_processed_final = quantity_post_stepSize_applied[1]
+        quantity_processed_final = quantity_post_stepSize_applied
         
         # Output
         if quantity_processed_final > _symbol_min_qty_value:
@@ -1103,9 +1669,13 @@ class BinanceAPI:
         _symbol_min_qty_value       = None
         _symbol_min_notional        = None
         _symbol_lot_size            = None
+        _symbol_quantizer           = None
+        _symbol_entry               = None
         _symbol_min_notional_value  = None        
         _symbol_price               = None
         _symbol_price_value         = None
+        _calls                      = None
+        _prefetched                 = None
         
 
         # Prepare Quantity Vars
@@ -1115,8 +1685,17 @@ class BinanceAPI:
         quantity_post_stepSize_applied  = None
         quantity_processed_final        = None
 
+        """ Prefetch --> the inputs below don't depend on each other, so they are fetched concurrently """
+        _calls = {
+            'bal_first_free'    : (self.account_get_balance_asset_free, (self.symbol_first,)),
+            'symbol_entry'      : (self.general_get_symbol_entry, ()),
+        }
+        if p_type == 'market':
+            _calls['symbol_price'] = (self.general_get_symbol_avg_price, ())
+        _prefetched = self.general_prefetch(_calls)
+
         """ Get Owned Asset Balance Free """
-        _symbol_bal_first_free = self.account_get_balance_asset_free(self.symbol_first)
+        _symbol_bal_first_free = _prefetched.get('bal_first_free')
         if _symbol_bal_first_free[0] != 'OK':
             _response_tuple = ('NOK',  _symbol_bal_first_free[1])
             return(_response_tuple)
@@ -1125,16 +1704,14 @@ class BinanceAPI:
         quantity_pre_size_applied = _symbol_bal_first_free[1]
 
 
-        # I break down the formula quantity_post_size_applied = round(Decimal(quantity_pre_size_applied) / Decimal(100) *  Decimal(p_size), 5)
-        # into elementary steps
+        # I break down the formula quantity_post_size_applied = truncate(Decimal(quantity_pre_size_applied) / Decimal(100) *  Decimal(p_size), 5 decimals)
+        # into elementary steps, all of them ROUND_DOWN in a local context so the thread's context is left alone
 
         # Default Value
         _p_size_str = None
         _p_size_decimal = None
         _quantity_pre_size_applied_decimal = None
-        _100_int = 100
-        _100_str = None
-        _100_decimal = None
+        _100_decimal = Decimal(100)
         _division = None
         _multiplication = None        
         _inputs_temp = None      
@@ -1148,15 +1725,6 @@ class BinanceAPI:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs+_inputs_temp,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        # Prepare 100 ( str -> decimal )
-        _100_str = str(_100_int)
-        try:
-            _100_decimal = Decimal(_100_str)
-        except Exception:
-            _inputs_temp = f"||{type(_100_int)},{_100_int}|{type(_100_str)},{_100_str}|{type(_100_decimal)},{_100_decimal}"            
-            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs+_inputs_temp,traceback.format_exc(2))}")
-            return(_response_tuple)
-
         # Prepare quantity_pre_size_applied
         try:            
             _quantity_pre_size_applied_decimal = Decimal(quantity_pre_size_applied)
@@ -1167,7 +1735,8 @@ class BinanceAPI:
 
         # Operate Division
         try:
-            _division = _quantity_pre_size_applied_decimal / _100_decimal
+            with localcontext(TRUNCATE_CONTEXT):
+                _division = _quantity_pre_size_applied_decimal / _100_decimal
         except Exception:
             _inputs_temp = f"||{type(_100_decimal)},{_100_decimal}|{type(_quantity_pre_size_applied_decimal)},{_quantity_pre_size_applied_decimal}|{type(_division)},{_division}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs+_inputs_temp,traceback.format_exc(2))}")
@@ -1175,7 +1744,8 @@ class BinanceAPI:
         
         # Operate Multiplication
         try:                 
-            _multiplication = _division * _p_size_decimal
+            with localcontext(TRUNCATE_CONTEXT):
+                _multiplication = _division * _p_size_decimal
         except Exception:
             _inputs_temp = f"||{type(_p_size_decimal)},{_p_size_decimal}|{type(_division)},{_division}|{type(_multiplication)},{_multiplication}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs,traceback.format_exc(2))}")
@@ -1183,7 +1753,7 @@ class BinanceAPI:
         
         # Operate Round
         try:             
-            quantity_post_size_applied = round(_multiplication, 5)
+            quantity_post_size_applied = truncate(_multiplication, SIZE_EXPONENT)
         except Exception:
             _inputs_temp = f"||{type(_multiplication)},{_multiplication}|{type(quantity_post_size_applied)},{quantity_post_size_applied}"
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs+_inputs_temp,traceback.format_exc(2))}")
@@ -1198,21 +1768,21 @@ class BinanceAPI:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs+_inputs_temp,traceback.format_exc(2))}")
             return(_response_tuple)
 
-        """ Get Symbol LOT SIZE """
-        _symbol_lot_size = self.general_get_symbol_info_filter('LOT_SIZE')
-        if _symbol_lot_size[0] != 'OK':
-            _response_tuple = ('NOK',  _symbol_lot_size[1])
+        """ Get Symbol Rules --> LOT_SIZE, MIN_NOTIONAL and the quantizer in one lookup """
+        _symbol_entry = _prefetched.get('symbol_entry')
+        if _symbol_entry[0] != 'OK':
+            _response_tuple = ('NOK',  _symbol_entry[1])
             return(_response_tuple)
-
-        """ Get Symbol Filter MIN_NOTIONAL """
-        _symbol_min_notional = self.general_get_symbol_info_filter('MIN_NOTIONAL')
-        if _symbol_min_notional[0] != 'OK':
-            _response_tuple = ('NOK',  _symbol_min_notional[1])
+        _symbol_lot_size        = _symbol_entry[1].get('filters').get('LOT_SIZE')
+        _symbol_min_notional    = _symbol_entry[1].get('filters').get('MIN_NOTIONAL')
+        _symbol_quantizer       = _symbol_entry[1].get('quantizer')
+        if not _symbol_lot_size or not _symbol_min_notional:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Error','account_get_quantity_to_sell',_inputs,'LOT_SIZE or MIN_NOTIONAL filter is missing')}")
             return(_response_tuple)
 
         """ Get Symbol Avg Price or Symbol Input Price """
         if p_type == 'market':
-            _symbol_price = self.general_get_symbol_avg_price() # Avg Price
+            _symbol_price = _prefetched.get('symbol_price') # Avg Price
             if _symbol_price[0] != 'OK':
                 _response_tuple = ('NOK',  _symbol_price[1])
                 return(_response_tuple)                            
@@ -1228,9 +1798,9 @@ class BinanceAPI:
 
         """ Calculate Quantity End """
 
-        _symbol_step_size_value    = _symbol_lot_size[1].get('LOT_SIZE_stepSize')
-        _symbol_min_qty_value      = _symbol_lot_size[1].get('LOT_SIZE_minQty')
-        _symbol_min_notional_value = _symbol_min_notional[1].get('MIN_NOTIONAL_minNotional')
+        _symbol_step_size_value    = _symbol_lot_size.get('LOT_SIZE_stepSize')
+        _symbol_min_qty_value      = _symbol_lot_size.get('LOT_SIZE_minQty')
+        _symbol_min_notional_value = _symbol_min_notional.get('MIN_NOTIONAL_minNotional')
         _symbol_price_value        = _symbol_price[1]
         
         try:
@@ -1239,15 +1809,15 @@ class BinanceAPI:
             _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs,traceback.format_exc(2))}")
             return(_response_tuple)
         
-        # Truncate By Step Size
-        quantity_post_stepSize_applied = self.truncate_by_step_size(quantity_pre_stepSize_applied, _symbol_step_size_value)
-        if quantity_post_stepSize_applied[0] != 'OK':
-            _msg                = quantity_post_stepSize_applied[1]
-            _response_tuple = ('NOK',  f"{ utility.my_log('Error','account_get_quantity_to_sell',_inputs,_msg)}")
-            return(_response_tuple)            
+        # Truncate By Step Size --> MARKET_LOT_SIZE for market orders
+        try:
+            quantity_post_stepSize_applied = _symbol_quantizer.quantity(quantity_pre_stepSize_applied, p_type == 'market')
+        except Exception:
+            _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_get_quantity_to_sell',_inputs,traceback.format_exc(2))}")
+            return(_response_tuple)
         
         # Output
-        quantity_processed_final = quantity_post_stepSize_applied[1]
+        quantity_processed_final = quantity_post_stepSize_applied
         if quantity_processed_final > _symbol_min_qty_value:
 
             if (_symbol_price_value * quantity_processed_final) > _symbol_min_notional_value:
@@ -1846,9 +2416,6 @@ class BinanceAPI:
         _date           = None
         _temp1          = None
         _temp2          = None
-        
-        # Decimal digit
-        getcontext().prec = 8
 
         # Get&Build Type
         if p_type == 'stop_limit': # --> The type is not written on the output of a STOP_LOSS_LIMIT Order
@@ -1884,27 +2451,31 @@ class BinanceAPI:
             _fee_symbol     = None
             
             try:
-                
-                for _fill in p_result.get('fills'):
-                    
-                    # Get & Trasform & Cumulate
-                    if _fill.get('price'):
-                        _price = Decimal(_fill.get('price'))
-                    if _fill.get('qty'):
-                        _qty = Decimal(_fill.get('qty'))
-                    if _fill.get('commission'):
-                        _fee = _fee + Decimal(_fill.get('commission'))
-                        
-                    _fee_symbol = _fill.get('commissionAsset')
-    
-                    # Calculate
-                    _price_qty      = _price * _qty
-                    _price_qty_tot  = _price_qty + _price_qty
-                    _qty_tot        = _qty + _qty
-    
-                # Weighted average - Media Ponderata
-                if _price_qty_tot != 0 and _qty_tot != 0:
-                    _price_avg = _price_qty_tot / _qty_tot
+
+                # Decimal digit, for this calculation only --> the thread's context is left alone
+                with localcontext() as _decimal_context:
+                    _decimal_context.prec = 8
+
+                    for _fill in p_result.get('fills'):
+
+                        # Get & Trasform & Cumulate
+                        if _fill.get('price'):
+                            _price = Decimal(_fill.get('price'))
+                        if _fill.get('qty'):
+                            _qty = Decimal(_fill.get('qty'))
+                        if _fill.get('commission'):
+                            _fee = _fee + Decimal(_fill.get('commission'))
+
+                        _fee_symbol = _fill.get('commissionAsset')
+
+                        # Calculate
+                        _price_qty      = _price * _qty
+                        _price_qty_tot  = _price_qty + _price_qty
+                        _qty_tot        = _qty + _qty
+
+                    # Weighted average - Media Ponderata
+                    if _price_qty_tot != 0 and _qty_tot != 0:
+                        _price_avg = _price_qty_tot / _qty_tot
 
             except:
                 _response_tuple = ('NOK',  f"{ utility.my_log('Exception','account_format_create_order_result',_inputs,traceback.format_exc())}")
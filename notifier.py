@@ -0,0 +1,181 @@
+# Notification dispatcher
+# Queues notifications and delivers them through Apprise from a background thread,
+# so a slow notification service never holds up order polling
+
+import asyncio
+from queue import Queue, Empty
+from threading import Thread, Lock
+from time import monotonic
+
+class NotificationDispatcher:
+
+    def __init__(self, apprise_client = None, title = 'BinanceNotifier', delivery_time = None, latency_time = None, apprise_factory = None):
+
+        # Either an Apprise object, or apprise_factory to build one in the dispatcher thread once it starts
+        self.apprise_client = apprise_client
+        self.apprise_factory= apprise_factory
+        self.title          = title
+        self.delivery_time  = delivery_time # Optional metrics.Histogram of seconds spent in Apprise per notification
+        self.latency_time   = latency_time  # Optional metrics.Histogram of seconds from queueing to delivery
+
+        # Working
+        self.queue          = Queue()
+        self.thread         = None
+        self.lock           = Lock()
+        self.apprise_lock   = Lock()
+        self.loop           = None # Event loop of run_async(), woken up through wakeup when a notification is queued
+        self.wakeup         = None
+
+        # Metrics
+        self.delivered      = 0   # Notifications Apprise accepted
+        self.failed         = 0   # Notifications Apprise rejected or raised on
+        self.latency_total  = 0.0 # Seconds from queueing to delivery, summed over delivered notifications
+        self.latency_max    = 0.0
+        self.last_latency   = None
+
+    # Deliver queued notifications in a background thread
+    def start(self):
+        self.thread = Thread(target=self.run, name="notifier", daemon=True)
+        self.thread.start()
+
+    # Queue a notification, never blocks
+    def notify(self, message):
+        self.queue.put((monotonic(), message))
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    # Wait up to timeout seconds for every queued notification to be handled, True if they all were
+    def drain(self, timeout):
+        deadline = monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    # Number of notifications waiting to be delivered
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    # Build the Apprise object if it was left to the factory, tried again on the next notification if it fails
+    def get_apprise_client(self):
+        with self.apprise_lock:
+            if self.apprise_client is None:
+                self.apprise_client = self.apprise_factory()
+            return self.apprise_client
+
+    # Set Apprise up before the first notification needs it
+    def prepare(self):
+        try:
+            self.get_apprise_client()
+        except Exception as e:
+            print("-- Notification setup failed: " + repr(e) + " --")
+
+    # Deliver notifications in the order they were queued
+    def run(self):
+        self.prepare()
+        while True:
+            queued, message = self.queue.get()
+            started = monotonic()
+            try:
+                sent = self.get_apprise_client().notify(body=message, title=self.title)
+            except Exception as e:
+                print("-- Notification failed: " + repr(e) + " --")
+                sent = False
+            self.record(queued, started, sent)
+
+    # Same as run() as a coroutine, for the asyncio engine
+    # Only setting Apprise up runs in an executor thread, importing it blocks for a while and it has no async version
+    async def run_async(self):
+        self.wakeup = asyncio.Event()
+        self.loop   = asyncio.get_running_loop()
+        try:
+            await self.loop.run_in_executor(None, self.prepare)
+            while True:
+                try:
+                    queued, message = self.queue.get_nowait()
+                except Empty:
+                    # Nothing else runs on the loop between clear() and empty(), so a notify() in between isn't missed
+                    self.wakeup.clear()
+                    if self.queue.empty():
+                        await self.wakeup.wait()
+                    continue
+                started = monotonic()
+                try:
+                    if self.apprise_client is None:
+                        await self.loop.run_in_executor(None, self.get_apprise_client)
+                    sent = await self.apprise_client.async_notify(body=message, title=self.title)
+                except Exception as e:
+                    print("-- Notification failed: " + repr(e) + " --")
+                    sent = False
+                self.record(queued, started, sent)
+        finally:
+            # notify() after the loop stopped must not try to wake it
+            self.loop = None
+
+    # Update the metrics once a notification has been handled
+    def record(self, queued, started, sent):
+        now     = monotonic()
+        latency = now - queued
+        if self.delivery_time is not None:
+            self.delivery_time.observe(now - started)
+        with self.lock:
+            if sent:
+                self.delivered      += 1
+                self.latency_total  += latency
+                self.latency_max    = max(self.latency_max, latency)
+                self.last_latency   = latency
+            else:
+                self.failed += 1
+        if sent and self.latency_time is not None:
+            self.latency_time.observe(latency)
+        if sent:
+            print("Notification sent after " + str(format(latency, '.2f')) + " seconds")
+        self.queue.task_done()
+
+    # Snapshot of the dispatcher metrics
+    def metrics(self):
+        with self.lock:
+            return {
+                'queue_depth':  self.queue_depth(),
+                'delivered':    self.delivered,
+                'failed':       self.failed,
+                'latency_avg':  self.latency_total / self.delivered if self.delivered else None,
+                'latency_max':  self.latency_max,
+                'latency_last': self.last_latency,
+            }
+
+class NotificationCoalescer:
+
+    def __init__(self, dispatcher, window = 0):
+
+        self.dispatcher = dispatcher
+        self.window     = window # Seconds to keep collecting after the first message, 0 flushes every loop
+
+        # Working
+        self.messages   = []
+        self.first      = None
+
+    # Collect a message for the next digest
+    def add(self, message):
+        if not self.messages:
+            self.first = monotonic()
+        self.messages.append(message)
+
+    # Hand the collected messages to the dispatcher as one digest once the window has passed, or straight away with force
+    def flush(self, force = False):
+        if not self.messages:
+            return
+        if not force and monotonic() - self.first < self.window:
+            return
+        self.dispatcher.notify(self.render(self.messages))
+        self.messages = []
+        self.first    = None
+
+    # A digest of a single message is just that message
+    def render(self, messages):
+        if len(messages) == 1:
+            return messages[0]
+        return str(len(messages)) + " order updates:\n" + "\n".join(messages)
@@ -0,0 +1,56 @@
+# On-disk snapshot of the order state
+# Lets start.py pick up where it left off after a restart, instead of downloading the whole order history
+# again and silently categorising whatever was filled while it was down
+
+import json
+import sqlite3
+from hashlib import sha256
+
+class OrderSnapshot:
+
+    def __init__(self, path, api_key):
+
+        self.path       = path
+        # Only a snapshot taken for the same account may be loaded, the key itself is never written
+        self.account    = sha256(api_key.encode()).hexdigest()
+
+        # Working
+        self.db         = sqlite3.connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta     (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tickers  (ticker TEXT PRIMARY KEY, watermark INTEGER, evicted_watermark INTEGER);
+            CREATE TABLE IF NOT EXISTS pending  (ticker TEXT, order_id INTEGER, data TEXT, PRIMARY KEY (ticker, order_id));
+            CREATE TABLE IF NOT EXISTS complete (ticker TEXT, position INTEGER, order_id INTEGER, PRIMARY KEY (ticker, position));
+        ''')
+
+    # Load the state saved for tickers, returns {ticker: (watermark, OrderStore state)}
+    def load(self, tickers):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'account'").fetchone()
+        if row is None or row[0] != self.account:
+            return {}
+        states = {}
+        for ticker, watermark, evicted_watermark in self.db.execute("SELECT ticker, watermark, evicted_watermark FROM tickers"):
+            if ticker not in tickers:
+                continue
+            pending  = [json.loads(data) for (data,) in self.db.execute("SELECT data FROM pending WHERE ticker = ?", (ticker,))]
+            complete = [order_id for (order_id,) in self.db.execute("SELECT order_id FROM complete WHERE ticker = ? ORDER BY position", (ticker,))]
+            states[ticker] = (watermark, {'pending': pending, 'complete': complete, 'evicted_watermark': evicted_watermark})
+        return states
+
+    # Replace the snapshot with the current state of every ticker that has had its initial run
+    def save(self, order_stores, order_watermarks):
+        with self.db:
+            self.db.execute("DELETE FROM tickers")
+            self.db.execute("DELETE FROM pending")
+            self.db.execute("DELETE FROM complete")
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('account', ?)", (self.account,))
+            for ticker, watermark in order_watermarks.items():
+                state = order_stores[ticker].get_state()
+                self.db.execute("INSERT INTO tickers (ticker, watermark, evicted_watermark) VALUES (?, ?, ?)", (ticker, watermark, state['evicted_watermark']))
+                self.db.executemany("INSERT INTO pending (ticker, order_id, data) VALUES (?, ?, ?)",
+                                    ((ticker, order["orderId"], json.dumps(order)) for order in state['pending']))
+                self.db.executemany("INSERT INTO complete (ticker, position, order_id) VALUES (?, ?, ?)",
+                                    ((ticker, position, order_id) for position, order_id in enumerate(state['complete'])))
+
+    def close(self):
+        self.db.close()
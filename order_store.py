@@ -0,0 +1,158 @@
+# Order state store used by start.py to categorise orders
+# Orders are indexed by orderId so every lookup and status transition is O(1),
+# and completed orders are only kept for as long as the retention policy allows
+
+from collections import OrderedDict
+from time import monotonic
+
+# Fields that change during an order's life, an order with the same fingerprint categorises the same way
+def order_fingerprint(order):
+    return (order["status"], order["executedQty"], order.get("updateTime"))
+
+# Transitions returned by OrderStore.update()
+ORDER_CREATED   = "created"   # Unknown order that is still open
+ORDER_COMPLETED = "completed" # Unknown order that is already filled or cancelled
+ORDER_FILLED    = "filled"    # Pending order that got filled
+ORDER_CANCELLED = "cancelled" # Pending order that got cancelled
+ORDER_CLOSED    = "closed"    # Pending order that left NEW for any other status
+
+class OrderStore:
+
+    def __init__(self, max_complete = 10000, max_complete_age = None):
+
+        # Retention policy for completed orders, by count and by age in seconds
+        self.max_complete       = max_complete
+        self.max_complete_age   = max_complete_age
+
+        # Working
+        self.pending            = {}            # orderId -> order
+        self.complete           = OrderedDict() # orderId -> (time categorised, order), oldest first
+        self.evicted_watermark  = 0             # Highest orderId evicted from self.complete
+        self.response           = None          # (length, first orderId, last orderId) of the last response
+        self.response_pending   = {}            # orderId -> (index, fingerprint) of the pending orders in it
+
+    # Lowest orderId that is still pending, None if nothing is pending
+    def oldest_pending_id(self):
+        if not self.pending:
+            return None
+        return min(self.pending)
+
+    # Categorise a batch of orders, returns the list of (transition, order) it caused
+    # Forgets the last response, update_response() compares the next one in full
+    def update(self, orders):
+        self.response = None
+        events = []
+        for order in orders:
+            order_id = order["orderId"]
+            status   = order["status"]
+
+            if order_id in self.pending:
+                if status == "NEW":
+                    continue
+                del self.pending[order_id]
+                self.add_complete(order)
+                if status == "FILLED":
+                    events.append((ORDER_FILLED, order))
+                elif status == "CANCELED":
+                    events.append((ORDER_CANCELLED, order))
+                else:
+                    events.append((ORDER_CLOSED, order))
+
+            elif order_id in self.complete:
+                continue
+
+            elif status != "NEW":
+                if order_id <= self.evicted_watermark:
+                    # Already categorised once and dropped by the retention policy
+                    continue
+                self.add_complete(order)
+                events.append((ORDER_COMPLETED, order))
+
+            else:
+                self.pending[order_id] = order
+                events.append((ORDER_CREATED, order))
+
+        self.evict()
+        return events
+
+    # Same as update() for a whole allOrders response, only the orders that changed since the previous response are
+    # categorised. Returns (changed orders, transitions), both empty when nothing changed
+    def update_response(self, orders):
+        changed, appended_at = self.changed_orders(orders)
+        events = self.update(changed)
+        self.remember_response(orders, appended_at)
+        return changed, events
+
+    # Orders that can have changed since the previous response, and the index the orders that weren't in it start at
+    # allOrders returns a contiguous range of orderIds in ascending order and new orders always get a higher orderId,
+    # so while the response starts at the same order and still has the previous last order at the same index, only
+    # the pending orders (at the index they were at) and anything after it can differ. Completed orders never change
+    def changed_orders(self, orders):
+        if self.response is None or not orders:
+            return orders, 0
+        length, first_id, last_id = self.response
+        if len(orders) < length or orders[0]["orderId"] != first_id or orders[length - 1]["orderId"] != last_id:
+            return orders, 0
+        changed = []
+        for order_id, (index, fingerprint) in self.response_pending.items():
+            order = orders[index]
+            if order["orderId"] != order_id:
+                return orders, 0
+            if order_fingerprint(order) != fingerprint:
+                changed.append(order)
+        return changed + orders[length:], length
+
+    # Keep what changed_orders() compares the next response against
+    def remember_response(self, orders, appended_at):
+        if not orders:
+            self.response = None
+            self.response_pending = {}
+            return
+        if appended_at:
+            response_pending = {order_id: (index, order_fingerprint(orders[index]))
+                                for order_id, (index, _) in self.response_pending.items() if order_id in self.pending}
+        else:
+            response_pending = {}
+        for index in range(appended_at, len(orders)):
+            order = orders[index]
+            if order["orderId"] in self.pending:
+                response_pending[order["orderId"]] = (index, order_fingerprint(order))
+        self.response = (len(orders), orders[0]["orderId"], orders[-1]["orderId"])
+        self.response_pending = response_pending
+
+    # Compact copy of the state for OrderSnapshot, completed orders are only needed by orderId
+    def get_state(self):
+        return {
+            'pending':              list(self.pending.values()),
+            'complete':             list(self.complete),
+            'evicted_watermark':    self.evicted_watermark,
+        }
+
+    # Restore a state returned by get_state(), the retention age of completed orders starts again from now
+    def set_state(self, state):
+        self.pending            = {order["orderId"]: order for order in state['pending']}
+        self.complete           = OrderedDict()
+        now                     = monotonic()
+        for order_id in state['complete']:
+            self.complete[order_id] = (now, {"orderId": order_id})
+        self.evicted_watermark  = state['evicted_watermark']
+        self.response           = None
+        self.response_pending   = {}
+        self.evict()
+
+    # Store an order as completed
+    def add_complete(self, order):
+        self.complete[order["orderId"]] = (monotonic(), order)
+
+    # Drop the oldest completed orders that fall outside the retention policy
+    def evict(self):
+        now = monotonic()
+        while self.complete:
+            order_id, (categorised, order) = next(iter(self.complete.items()))
+            too_many = self.max_complete is not None and len(self.complete) > self.max_complete
+            too_old  = self.max_complete_age is not None and now - categorised > self.max_complete_age
+            if not (too_many or too_old):
+                break
+            del self.complete[order_id]
+            if order_id > self.evicted_watermark:
+                self.evicted_watermark = order_id
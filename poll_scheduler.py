@@ -0,0 +1,90 @@
+# Poll scheduler for monitoring several tickers from one process
+# Every ticker gets a share of the request weight budget proportional to its priority,
+# so tickers with equal priorities are polled round-robin and busier ones can be polled more often
+# Intervals are worked out for polls of poll_weight, a poll that turned out heavier (eg. extra pages or individual
+# order lookups) is charged its actual weight by pushing the ticker's next poll back by as much
+
+import heapq
+from time import monotonic
+
+# Interval names used by Binance rateLimits, in seconds
+RATE_LIMIT_INTERVALS = {"Second": 1, "Minute": 60, "Hour": 3600, "Day": 86400}
+
+# Read the request weight limit out of BinanceAPI.general_get_rate_limits(), as (limit, interval in seconds)
+def parse_weight_limit(rate_limits, default = (1200, 60)):
+    if rate_limits[0] != 'OK':
+        return default
+    for key, limit in rate_limits[1].items():
+        # eg. "Max Requests for 1 Minute"
+        if key.startswith("Max Requests for "):
+            interval_num, interval = key[len("Max Requests for "):].split(" ")
+            if interval in RATE_LIMIT_INTERVALS:
+                return (int(limit), int(interval_num) * RATE_LIMIT_INTERVALS[interval])
+    return default
+
+class PollScheduler:
+
+    def __init__(self, tickers, weight_limit, weight_interval = 60, budget_fraction = 0.5, poll_weight = 10, min_interval = 1):
+
+        # tickers: {ticker: priority}
+        self.tickers            = tickers
+        self.poll_weight        = poll_weight
+        self.budget             = weight_limit * budget_fraction # Weight polling may use per weight_interval
+
+        # Share the budget between tickers by priority, never polling one more often than min_interval
+        polls_per_second        = self.budget / weight_interval / poll_weight
+        total_priority          = sum(tickers.values())
+        self.intervals          = {}
+        for ticker, priority in tickers.items():
+            self.intervals[ticker] = max(min_interval, total_priority / (polls_per_second * priority))
+
+        # Every ticker is due straight away for its initial run
+        now                     = monotonic()
+        self.queue              = [(now, position, ticker) for position, ticker in enumerate(tickers)]
+        self.next_at            = {ticker: now for ticker in tickers} # Queue entries at another time are stale
+        self.positions          = {ticker: position for position, ticker in enumerate(tickers)}
+        self.first_poll         = set(tickers)
+        heapq.heapify(self.queue)
+
+    # Return the tickers that are due to be polled and schedule their next poll
+    def due(self, now = None):
+        if now is None:
+            now = monotonic()
+        tickers = []
+        while self.queue and self.queue[0][0] <= now:
+            due_at, position, ticker = heapq.heappop(self.queue)
+            if due_at != self.next_at[ticker]:
+                continue
+            tickers.append(ticker)
+            interval = self.intervals[ticker]
+            if ticker in self.first_poll:
+                # Spread tickers over their interval after the initial run instead of polling them all together
+                self.first_poll.discard(ticker)
+                next_at = now + interval * (position + 1) / len(self.tickers)
+            else:
+                next_at = max(due_at + interval, now)
+            self.next_at[ticker] = next_at
+            heapq.heappush(self.queue, (next_at, position, ticker))
+        return tickers
+
+    # Charge a poll of ticker that used weight rather than poll_weight, ie. move its next poll to where the budget allows
+    def charge(self, ticker, weight):
+        if weight <= self.poll_weight:
+            return
+        next_at = self.next_at[ticker] + self.intervals[ticker] * (weight - self.poll_weight) / self.poll_weight
+        self.next_at[ticker] = next_at
+        heapq.heappush(self.queue, (next_at, self.positions[ticker], ticker))
+
+    # Seconds until the next ticker is due
+    def time_until_due(self, now = None):
+        if now is None:
+            now = monotonic()
+        while self.queue and self.queue[0][0] != self.next_at[self.queue[0][2]]:
+            heapq.heappop(self.queue) # Stale
+        if not self.queue:
+            return None
+        return max(0, self.queue[0][0] - now)
+
+    # Request weight per minute the schedule works out to
+    def weight_per_minute(self):
+        return sum(60 / interval * self.poll_weight for interval in self.intervals.values())
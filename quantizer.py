@@ -0,0 +1,48 @@
+# Decimal quantizers for order quantities
+# Every step size is turned into the exponent to quantize to once, and amounts are truncated with a private
+# Decimal context, so nothing touches the thread's context and it's safe to use from several threads at once
+
+import math
+from decimal import Context, Decimal, ROUND_DOWN
+from functools import lru_cache
+
+# Never rounds up, so an order never asks for more than the balance allows
+# Only ever passed explicitly or copied by localcontext(), the flags it collects are never read
+TRUNCATE_CONTEXT = Context(rounding = ROUND_DOWN)
+
+# Percentage of a balance put on an order is cut to 5 decimals before the step size is applied
+SIZE_EXPONENT = Decimal('1E-5')
+
+# Exponent to quantize to for a stepSize, eg. 0.00100000 -> 1E-3
+# Same number of digits truncate_by_step_size always used, ie. the nearest power of ten
+@lru_cache(maxsize = None)
+def step_exponent(step_size):
+    digits = int(round(-math.log(Decimal(step_size), 10), 0))
+    return Decimal(1).scaleb(-digits)
+
+# Truncate value to exponent
+def truncate(value, exponent):
+    return Decimal(value).quantize(exponent, context = TRUNCATE_CONTEXT)
+
+class SymbolQuantizer:
+
+    def __init__(self, symbol, filters):
+
+        # filters: the symbol's filters from exchangeInfo, a missing filter leaves its amounts untouched
+        self.symbol             = symbol
+        self.quantity_exponent  = None # LOT_SIZE
+        self.market_exponent    = None # MARKET_LOT_SIZE, falls back to LOT_SIZE
+        for _filter in filters:
+            if _filter.get('filterType') == 'LOT_SIZE' and Decimal(_filter.get('stepSize') or 0) > 0:
+                self.quantity_exponent = step_exponent(Decimal(_filter.get('stepSize')))
+            elif _filter.get('filterType') == 'MARKET_LOT_SIZE' and Decimal(_filter.get('stepSize') or 0) > 0:
+                self.market_exponent = step_exponent(Decimal(_filter.get('stepSize')))
+        if self.market_exponent is None:
+            self.market_exponent = self.quantity_exponent
+
+    # Order quantity truncated to the step size, market orders use MARKET_LOT_SIZE
+    def quantity(self, value, market = False):
+        exponent = self.market_exponent if market else self.quantity_exponent
+        if exponent is None:
+            return Decimal(value)
+        return truncate(value, exponent)
@@ -0,0 +1,203 @@
+# Request weight limiter shared by every python-binance Client in the process
+# Keeps a running estimate of the weight used in the current window, corrected by the
+# X-MBX-USED-WEIGHT-* headers Binance sends back (which include other processes on the same IP),
+# and holds requests back before they would push it over the limit
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import sleep, time
+
+# Call priorities, order polling should never wait for a balance valuation
+PRIORITY_HIGH = "high"
+PRIORITY_LOW  = "low"
+
+# Request weight of the /api endpoints BinanceAPI and start.py call, by path after the API version
+# /sapi and /fapi endpoints have their own limits and are not counted here
+ENDPOINT_WEIGHTS = {
+    "ping":           1,
+    "time":           1,
+    "exchangeInfo":   10,
+    "avgPrice":       1,
+    "ticker/price":   1,  # 2 without a symbol
+    "ticker/24hr":    1,  # 40 without a symbol
+    "order":          1,  # 2 for GET
+    "order/oco":      1,
+    "allOrders":      10,
+    "openOrders":     3,  # 40 without a symbol
+    "account":        10,
+    "myTrades":       10,
+    "userDataStream": 1,
+}
+
+# Request weight of one call to an /api endpoint, None for endpoints that aren't counted
+def endpoint_weight(method, uri, params = None):
+    if "/api/" not in uri:
+        return None
+    path = uri.split("?")[0].split("/api/", 1)[1].split("/", 1)[-1] # Strip the version, eg. v3/allOrders -> allOrders
+    weight = ENDPOINT_WEIGHTS.get(path, 1)
+    has_symbol = bool(params) and "symbol" in params
+    if path == "openOrders" and not has_symbol:
+        weight = 40
+    elif path == "ticker/price" and not has_symbol:
+        weight = 2
+    elif path == "ticker/24hr" and not has_symbol:
+        weight = 40
+    elif path == "order" and method == "get":
+        weight = 2
+    return weight
+
+class RateLimiter:
+
+    def __init__(self, weight_limit = 1200, weight_interval = 60, low_priority_budget = 0.8, high_priority_budget = 0.95):
+
+        # Limits, the high priority budget keeps a margin for headers lagging behind
+        self.weight_limit   = weight_limit
+        self.weight_interval= weight_interval
+        self.budgets        = { PRIORITY_HIGH: weight_limit * high_priority_budget,
+                                PRIORITY_LOW:  weight_limit * low_priority_budget }
+
+        # Working
+        self.lock           = Lock()
+        self.priority_var   = ContextVar("rate_limiter_priority", default = PRIORITY_HIGH) # Per thread and per asyncio task
+        self.meter_var      = ContextVar("rate_limiter_meter", default = None) # Weight counted by metered()
+        self.window         = None  # Start of the current window, Binance resets used weight on interval boundaries
+        self.used_weight    = 0     # Weight used in the current window, as last reported by Binance plus our own requests since
+        self.blocked_until  = 0     # Set from Retry-After after a 429 or 418
+        self.spent          = { PRIORITY_HIGH: 0, PRIORITY_LOW: 0 } # Total weight requested per priority
+
+    # Run calls made from this thread (or asyncio task) inside the block with another priority
+    @contextmanager
+    def priority(self, priority):
+        token = self.priority_var.set(priority)
+        try:
+            yield
+        finally:
+            self.priority_var.reset(token)
+
+    def current_priority(self):
+        return self.priority_var.get()
+
+    # Count the weight of the requests made from this thread (or asyncio task) inside the block, in meter[0]
+    @contextmanager
+    def metered(self):
+        meter = [0]
+        token = self.meter_var.set(meter)
+        try:
+            yield meter
+        finally:
+            self.meter_var.reset(token)
+
+    def meter(self, weight):
+        meter = self.meter_var.get()
+        if meter is not None:
+            meter[0] += weight
+
+    # Roll the window over when its interval has passed, needs self.lock
+    def roll_window(self, now):
+        window = now - now % self.weight_interval
+        if window != self.window:
+            self.window         = window
+            self.used_weight    = 0
+
+    # Check whether weight could be spent right now without waiting
+    def has_room(self, weight, priority = PRIORITY_HIGH):
+        with self.lock:
+            now = time()
+            self.roll_window(now)
+            return now >= self.blocked_until and self.used_weight + weight <= self.budgets[priority]
+
+    # Count weight as used if it fits in the budget of priority, otherwise return how long to wait before trying again
+    def reserve(self, weight, priority):
+        with self.lock:
+            now = time()
+            self.roll_window(now)
+            if now < self.blocked_until:
+                wait = self.blocked_until - now
+            elif self.used_weight + weight > self.budgets[priority] and self.used_weight > 0:
+                wait = self.window + self.weight_interval - now
+            else:
+                self.used_weight        += weight
+                self.spent[priority]    += weight
+                return 0
+        print("-- Request weight limit reached, holding back a " + priority + " priority request for " + str(format(wait, '.1f')) + " seconds --")
+        return wait
+
+    # Wait until weight fits in the budget of the current priority, then count it as used
+    def acquire(self, weight):
+        priority = self.current_priority()
+        wait = self.reserve(weight, priority)
+        while wait:
+            sleep(wait)
+            wait = self.reserve(weight, priority)
+        self.meter(weight)
+
+    # Same as acquire() without blocking the event loop
+    async def acquire_async(self, weight):
+        priority = self.current_priority()
+        wait = self.reserve(weight, priority)
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.reserve(weight, priority)
+        self.meter(weight)
+
+    # Correct the estimate from the headers of a Binance response
+    def update(self, response):
+        if response is None:
+            return
+        with self.lock:
+            now = time()
+            self.roll_window(now)
+            for header, value in response.headers.items():
+                if header.lower().startswith("x-mbx-used-weight-"):
+                    self.used_weight = int(value)
+                    break
+            status = getattr(response, "status_code", None) or getattr(response, "status", None) # requests or aiohttp
+            if status in (418, 429):
+                # Rate limited (429) or banned (418), nothing may be sent until Retry-After has passed
+                retry_after = int(response.headers.get("Retry-After", self.weight_interval))
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+                print("-- Binance returned " + str(status) + ", pausing requests for " + str(retry_after) + " seconds --")
+
+    # Send every /api request a python-binance Client makes through the limiter
+    # The headers are read from the response handed to _handle_response(), which is local to each call, rather than
+    # from client.response, which every thread sharing the client overwrites
+    def attach(self, client):
+        request = client._request
+        handle_response = client._handle_response
+
+        def limited_request(method, uri, signed, force_params = False, **kwargs):
+            weight = endpoint_weight(method, uri, kwargs.get("data") or kwargs.get("params"))
+            if weight is not None:
+                self.acquire(weight)
+            return request(method, uri, signed, force_params, **kwargs)
+
+        def limited_handle_response(response):
+            if "/api/" in str(response.url):
+                self.update(response)
+            return handle_response(response)
+
+        client._request = limited_request
+        client._handle_response = limited_handle_response
+        return client
+
+    # Same as attach() for a python-binance AsyncClient
+    def attach_async(self, client):
+        request = client._request
+        handle_response = client._handle_response
+
+        async def limited_request(method, uri, signed, force_params = False, **kwargs):
+            weight = endpoint_weight(method, uri, kwargs.get("data") or kwargs.get("params"))
+            if weight is not None:
+                await self.acquire_async(weight)
+            return await request(method, uri, signed, force_params, **kwargs)
+
+        async def limited_handle_response(response):
+            if "/api/" in str(response.url):
+                self.update(response)
+            return await handle_response(response)
+
+        client._request = limited_request
+        client._handle_response = limited_handle_response
+        return client
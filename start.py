@@ -1,19 +1,36 @@
 #!/usr/bin/env python3
 
-from apprise import Apprise
-from binance.client import Client
+import asyncio
+import signal
+from api_recorder import ApiRecorder
+from binance.client import Client, AsyncClient, BinanceAPIException
+from decimal import Decimal
+from call_profiler import CallProfiler
+from job_scheduler import JobScheduler
 from os import environ    
+from threading import Thread
 from time import sleep
+from metrics import MetricsRegistry, MetricsServer, Histogram, Gauge
 from my_class import BinanceAPI
+from notifier import NotificationDispatcher, NotificationCoalescer
+from order_snapshot import OrderSnapshot
+from order_store import OrderStore, ORDER_CREATED, ORDER_COMPLETED, ORDER_FILLED, ORDER_CANCELLED, ORDER_CLOSED
+from poll_scheduler import PollScheduler, parse_weight_limit
+from rate_limiter import RateLimiter, PRIORITY_LOW
 
-def notify(message):
-    # Sends notification via Apprise
+def notify(message, event = None):
+    # Queues a notification, the dispatcher sends it via Apprise in the background
+    # Order events are collected into one digest per loop (or digest window) unless they're urgent
+    if event is None or notify_mode == "event" or event in notify_urgent:
+        dispatcher.notify(message)
+    else:
+        coalescer.add(message)
 
-    appriseClient.notify(
-        body=message,
-        title='BinanceNotifier',
-    )
-    print("Notification sent")
+def print_notifier_metrics():
+    # Prints how notification delivery is keeping up
+    notifier_metrics = dispatcher.metrics()
+    if notifier_metrics['latency_avg'] is not None:
+        print("Notifications: " + str(notifier_metrics['delivered']) + " sent, " + str(notifier_metrics['failed']) + " failed, " + str(notifier_metrics['queue_depth']) + " queued, " + str(format(notifier_metrics['latency_avg'], '.2f')) + "s average / " + str(format(notifier_metrics['latency_max'], '.2f')) + "s max latency")
 
 def get_currency_config():
      # Currency config
@@ -28,6 +45,161 @@ def get_currency_config():
         currency = "AUD"
     return currency
 
+def get_tickers_config():
+    # Comma separated list of tickers, each optionally followed by :priority (eg. VOXELUSDT:3,ETHUSDT)
+    # Tickers with equal priorities are polled round-robin, higher priorities get polled more often
+    tickers = {}
+    for entry in environ['BINANCE_TICKER'].split(","):
+        ticker, _, priority = entry.strip().partition(":")
+        if not ticker:
+            continue
+        try:
+            tickers[ticker.upper()] = max(1, int(priority)) if priority else 1
+        except ValueError:
+            print("-- Warning: Priority for " + ticker + " is not a number, defaulting to 1 --")
+            tickers[ticker.upper()] = 1
+    return tickers
+
+def get_notify_mode_config():
+    # Notification mode
+    # digest: order events found in the same loop (or digest window) are sent as one notification
+    # event: every order event is sent as its own notification
+    try:
+        notify_mode = environ['NOTIFY_MODE'].lower()
+    except KeyError:
+        notify_mode = "digest"
+    supported_notify_modes = ["digest", "event"]
+    if notify_mode not in supported_notify_modes:
+        print("-- Warning: You did not give a supported notify mode, defaulting to digest --")
+        notify_mode = "digest"
+    return notify_mode
+
+def get_notify_urgent_config():
+    # Order events that skip the digest and are sent straight away, eg. "filled,cancelled"
+    supported_events = [ORDER_CREATED, ORDER_COMPLETED, ORDER_FILLED, ORDER_CANCELLED]
+    urgent = []
+    for event in environ.get('NOTIFY_URGENT', "").lower().split(","):
+        event = event.strip()
+        if event in supported_events:
+            urgent.append(event)
+        elif event:
+            print("-- Warning: " + event + " is not an order event, ignoring it in NOTIFY_URGENT --")
+    return urgent
+
+def get_notify_digest_window_config():
+    # Seconds to keep collecting order events into a digest, 0 sends a digest every loop
+    try:
+        return max(0.0, float(environ['NOTIFY_DIGEST_WINDOW']))
+    except KeyError:
+        return 0.0
+    except ValueError:
+        print("-- Warning: You did not give a valid digest window, defaulting to 0 --")
+        return 0.0
+
+def get_budget_config(name, default):
+    # Fraction of the Binance request weight limit something may use
+    try:
+        budget = float(environ[name])
+    except KeyError:
+        budget = default
+    except ValueError:
+        print("-- Warning: You did not give a valid " + name + ", defaulting to " + str(default) + " --")
+        budget = default
+    if not 0 < budget <= 1:
+        print("-- Warning: " + name + " must be between 0 and 1, defaulting to " + str(default) + " --")
+        budget = default
+    return budget
+
+def get_poll_mode_config():
+    # Order polling mode
+    # full: downloads the whole order history every loop
+    # incremental: only downloads orders from the oldest pending / highest settled orderId onwards
+    # stream: listens to the user data stream and only uses REST to reconcile after (re)connecting
+    # open: only downloads the open orders, and looks up the orders that are no longer open
+    try:
+        poll_mode = environ['POLL_MODE'].lower()
+    except KeyError:
+        poll_mode = "full"
+    supported_poll_modes = ["full", "incremental", "stream", "open"]
+    if poll_mode not in supported_poll_modes:
+        print("-- Warning: You did not give a supported poll mode, defaulting to full --")
+        poll_mode = "full"
+    return poll_mode
+
+def get_engine_config():
+    # Engine running the monitoring loop
+    # sync: one loop polling, checking the balance and sleeping in turn
+    # async: polling, balance alerts, heartbeats and notifications run as separate coroutines on one event loop
+    try:
+        engine = environ['ENGINE'].lower()
+    except KeyError:
+        engine = "sync"
+    supported_engines = ["sync", "async"]
+    if engine not in supported_engines:
+        print("-- Warning: You did not give a supported engine, defaulting to sync --")
+        engine = "sync"
+    return engine
+
+def get_retention_config(name, default):
+    # Retention policy for completed orders, an empty or invalid value disables that limit
+    try:
+        return int(environ[name])
+    except KeyError:
+        return default
+    except ValueError:
+        return None
+
+def get_snapshot_interval_config():
+    # Seconds between order state snapshots
+    try:
+        return max(1, int(environ['ORDER_SNAPSHOT_INTERVAL']))
+    except KeyError:
+        return 60
+    except ValueError:
+        print("-- Warning: You did not give a valid snapshot interval, defaulting to 60 --")
+        return 60
+
+def get_metrics_port_config():
+    # Port of the Prometheus metrics endpoint, disabled unless set
+    try:
+        return int(environ['METRICS_PORT'])
+    except KeyError:
+        return None
+    except ValueError:
+        print("-- Warning: You did not give a valid metrics port, disabling metrics --")
+        return None
+
+def get_balance_prices_config():
+    # Prices the balance is valued at
+    # snapshot: last prices of every symbol, fetched with a single request
+    # average: 5 minute average price, fetched with one request per symbol
+    try:
+        balance_prices = environ['BALANCE_PRICES'].lower()
+    except KeyError:
+        balance_prices = "snapshot"
+    supported_balance_prices = ["snapshot", "average"]
+    if balance_prices not in supported_balance_prices:
+        print("-- Warning: You did not give a supported balance price source, defaulting to snapshot --")
+        balance_prices = "snapshot"
+    return balance_prices
+
+def get_balance_vectorized_config():
+    # Values the balance with numpy array operations instead of one asset at a time, only with snapshot prices
+    # exact: Decimal arrays, same totals as the loop
+    # float: float64 arrays, fastest, totals rounded to float precision
+    balance_vectorized = environ.get('BALANCE_VECTORIZED', "").lower()
+    if not balance_vectorized:
+        return None
+    if balance_vectorized not in ["exact", "float"]:
+        print("-- Warning: You did not give a supported vectorized valuation, valuing one asset at a time --")
+        return None
+    try:
+        import numpy
+    except ImportError:
+        print("-- Warning: BALANCE_VECTORIZED needs numpy installed, valuing one asset at a time --")
+        return None
+    return balance_vectorized
+
 def get_balance_alert_config(request):
     # If balance_alert can be set to an integer, enable feature, otherwise disable it
     try:
@@ -41,13 +213,107 @@ def get_balance_alert_config(request):
     if request == "enabled":
         return balance_alert_enabled
 
+def get_client_class(base):
+    # python-binance client class, pointed at BINANCE_API_URL if set (eg. the testnet, or tools/mock_exchange.py)
+    if not binance_api_url:
+        return base
+    return type(base.__name__, (base,), {"API_URL": binance_api_url})
+
+def create_client():
+    # One python-binance Client for the whole process, its keep-alive session (and connection pool) is shared
+    # by the poll loop, nedludd0's BinanceAPI and the user data stream so connections are only set up once
+    return get_client_class(Client)(binance_api_key, binance_api_secret, requests_params = {"timeout": 20})
+
+def create_apprise():
+    # Importing Apprise loads every notification plugin it ships with, so the dispatcher does it
+    # in its own thread while the main thread is still connecting to Binance
+    from apprise import Apprise
+    appriseClient = Apprise()
+    appriseClient.add(notifier_protocol + "://" + notifier_api_user + '@' + notifier_api_app)
+    return appriseClient
+
+def save_snapshot():
+    # Writes the order state to disk so a restart carries on from here
+    if order_snapshot is not None:
+        order_snapshot.save(order_stores, order_watermarks)
+
+def print_api_profile():
+    # Prints where BinanceAPI spends its time and requests when PROFILE_API is set
+    if api_profiler is not None:
+        print(api_profiler.report())
+
+def create_recorder():
+    # Records every REST response and user data stream event to RECORD_API for tools/replay.py,
+    # along with the configuration replaying needs
+    return ApiRecorder(record_api_path, {
+        "tickers":              binance_tickers,
+        "api_url":              binance_api_url,
+        "currency":             currency,
+        "poll_mode":            poll_mode,
+        "notify_mode":          notify_mode,
+        "notify_urgent":        notify_urgent,
+        "notify_digest_window": notify_digest_window,
+        "balance_prices":       balance_prices,
+        "balance_vectorized":   balance_vectorized,
+        "orders_page_limit":    orders_page_limit,
+        "complete_orders_limit":complete_orders_limit,
+        "complete_orders_age":  complete_orders_age,
+        "engine":               engine,
+    })
+
+def stop(signum, frame):
+    # docker stop sends SIGTERM, exit the same way as on Ctrl+C so the order state gets saved
+    raise SystemExit(0)
+
+def create_metrics():
+    # Histograms are created up front so the client and functions can be wrapped before the first poll,
+    # gauges read the state of the running monitor whenever the endpoint is scraped
+    registry = MetricsRegistry()
+    histograms = {
+        'get_all_orders': registry.add(Histogram("binancenotifier_get_all_orders_seconds", "Latency of get_all_orders requests")),
+        'check':          registry.add(Histogram("binancenotifier_check_seconds", "Time spent categorising a batch of orders")),
+        'balance':        registry.add(Histogram("binancenotifier_balance_check_seconds", "Duration of a balance check", (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))),
+        'delivery':       registry.add(Histogram("binancenotifier_notification_delivery_seconds", "Time Apprise took to deliver a notification")),
+        'latency':        registry.add(Histogram("binancenotifier_notification_latency_seconds", "Time from queueing a notification until it was delivered")),
+    }
+    registry.add(Gauge("binancenotifier_used_weight", "Request weight used in the current window", lambda: rate_limiter.used_weight))
+    registry.add(Gauge("binancenotifier_weight_limit", "Request weight limit per window", lambda: rate_limiter.weight_limit))
+    registry.add(Gauge("binancenotifier_pending_orders", "Orders tracked as pending", lambda: {ticker: len(order_stores[ticker].pending) for ticker in order_stores}, "ticker"))
+    registry.add(Gauge("binancenotifier_complete_orders", "Completed orders remembered", lambda: {ticker: len(order_stores[ticker].complete) for ticker in order_stores}, "ticker"))
+    registry.add(Gauge("binancenotifier_notification_queue_depth", "Notifications waiting to be delivered", lambda: dispatcher.queue_depth()))
+    return registry, histograms
+
 def get_balance():
     # Returns total account balance in selected currency
 
-    # Create an object using nedludd0's class and use it to get total balances
-    nedludd0Client = BinanceAPI(p_api_pub_key = binance_api_key, p_api_secret_key = binance_api_secret, p_wallet = 'spot')
-    balance_total = nedludd0Client.account_get_balance_total()
+    # Use the long-lived object built on nedludd0's class to get total balances
+    balance_total = nedludd0Client.account_get_balance_total(p_price_snapshot = balance_prices == "snapshot", p_vectorized = balance_vectorized)
+    five_minute_average = None
+    if currency != "USD":
+        five_minute_average = binanceClient.get_avg_price(**{'symbol': 'BTC' + currency})["price"]
+    return convert_balance(balance_total, five_minute_average)
 
+async def get_balance_async():
+    # Same as get_balance() on the AsyncClient, the account and the prices are fetched here
+    # and nedludd0's class only values them, without making requests of its own
+    if balance_prices == "snapshot":
+        account, tickers = await asyncio.gather(asyncClient.get_account(), asyncClient.get_all_tickers())
+        prices = {ticker["symbol"]: Decimal(ticker["price"]) for ticker in tickers}
+    else:
+        account = await asyncClient.get_account()
+        symbols = nedludd0Client.account_get_balance_symbols(account)
+        if symbols[0] != 'OK':
+            raise Exception("Couldn't list the symbols to value the balance with, " + str(symbols[1]).strip())
+        averages = await asyncio.gather(*(asyncClient.get_avg_price(symbol=symbol) for symbol in symbols[1]))
+        prices = {symbol: Decimal(average["price"]) for symbol, average in zip(symbols[1], averages)}
+    balance_total = nedludd0Client.account_get_balance_total(p_vectorized = balance_vectorized, p_account_info = account, p_prices = prices)
+    five_minute_average = None
+    if currency != "USD":
+        five_minute_average = (await asyncClient.get_avg_price(symbol='BTC' + currency))["price"]
+    return convert_balance(balance_total, five_minute_average)
+
+def convert_balance(balance_total, five_minute_average):
+    # Total balance in selected currency, five_minute_average is the BTC price in it unless it's USD
     if currency == "USD":
         # Ticker BTCUSD does not exist, and nedludd0's BinanceAPI class has its own way to calculate this
         total_converted = balance_total[1][0].get('totals').get('tot_usd')
@@ -56,70 +322,304 @@ def get_balance():
         # Calculate total balance in BTC
         total_btc = balance_total[1][0].get('totals').get('tot_btc')
         total_btc = float(total_btc)
-        five_minute_average = binanceClient.get_avg_price(**{'symbol': 'BTC' + currency})["price"]
         five_minute_average = float(five_minute_average)
         total_converted = total_btc*five_minute_average
     
     print("Total balance in " + currency + ": " + str(format(total_converted, '.2f')))
     return total_converted
 
-def check(orders):
-    # Categorises orders into two groups
-    # complete_orders: Orders that have been completed (filled or cancelled)
-    # pending_orders: Orders that are currently in progress (unfilled)
-
-    for order in all_orders:
-        known = False
-        # `known` variable allows function to remember whether it has seen an order before
-
-        for pending in pending_orders:
-            if order["orderId"] == pending["orderId"]:
-                known = True
-
-                if order["status"] == "FILLED":
-                    # Notify if an order is filled
-                    notify("Order filled! " + str(float(order["executedQty"])) + "@" + str(float(order["price"])))
-                    print("Order " + str(order["orderId"]) + " filled")
-                elif order["status"] == "CANCELED":
-                    # Notify if an order is cancelled
-                    notify("Order " + str(order["orderId"]) + " cancelled successfully " + str(float(order["origQty"])) + "@" + str(float(order["price"])))
-                    print("Order " + str(order["orderId"]) + " cancelled")
-
-                if order["status"] != "NEW":
-                    # To be performed if an order's in the pending_orders array had a change in status
-                    print("Categorised " + str(order["orderId"]) + " as completed")
-                    complete_orders.append(order)
-                    for i in range(len(pending_orders)):
-                        # This needs some work, other options gave errors
-                        if pending_orders[i]["orderId"] == order["orderId"]:
-                            del pending_orders[i]
-                            break
-
-        for complete in complete_orders:
-            if order["orderId"] == complete["orderId"]:
-                # If an order is known, do nothing
-                known = True
-        if not known:
-            if order["status"] != "NEW":
-                # For orders that aren't pending, categorise as completed
-                print("Categorised " + str(order["orderId"]) + " as completed")
-                complete_orders.append(order)
-                if not initial_run:
-                    # If this isn't the first loop, notify about order having been filled
-                    notify("Order " + str(order["orderId"]) + " filled! " + str(float(order["origQty"])) + "@" + str(float(order["price"])))
-            elif order["status"] == "NEW":
-                # For orders that are't pending, categorise as such
-                print("Categorised " + str(order["orderId"]) + " as pending")
-                pending_orders.append(order)
-                if not initial_run:
-                    # If this isn't the first loop, notify about order creation
-                    notify("Order " + str(order["orderId"]) + " created successfully " + str(float(order["origQty"])) + "@" + str(float(order["price"])))
+def get_balance_low_priority():
+    # Balance check that leaves room in the request weight budget for order polling
+    with rate_limiter.priority(PRIORITY_LOW):
+        return get_balance()
+
+def balance_check():
+    # Sends the balance, or asks to run again a second later if it wouldn't fit in what's left
+    # of the request weight budget, so order polling doesn't have to wait for it
+    global balance_check_weight
+    if not rate_limiter.has_room(balance_check_weight, PRIORITY_LOW):
+        print("-- Balance check postponed, request weight is close to the limit --")
+        return 1
+    print("-- Performing balance check --")
+    spent = rate_limiter.spent[PRIORITY_LOW]
+    balance = get_balance_low_priority()
+    balance_check_weight = rate_limiter.spent[PRIORITY_LOW] - spent # Request weight the last balance check used
+    notify("Balance: " + str(format(balance, '.2f')) + " " + currency)
+    print("Balance notification queued")
+
+def heartbeat():
+    # Display "something" in the terminal so that users know it's still working
+    print("-- Still monitoring --")
+    print_notifier_metrics()
+    print_api_profile()
+
+def poll_due():
+    # Polls every ticker that's due, charging each poll the request weight it actually used,
+    # and returns how long until the next ticker is due
+    for ticker in poll_scheduler.due():
+        with rate_limiter.metered() as weight:
+            poll(ticker)
+        poll_scheduler.charge(ticker, weight[0])
+    coalescer.flush()
+    return poll_scheduler.time_until_due()
+
+def create_jobs():
+    # Periodic work, on a monotonic clock so a slow loop doesn't push it back
+    # The balance check runs in the background (a task with the async engine) so it never holds up order polling
+    jobs = JobScheduler()
+    if poll_mode != "stream":
+        # Runs whenever the poll scheduler has a ticker due, rather than on a fixed interval
+        jobs.add("poll", poll_due_async if engine == "async" else poll_due, None, delay = 0)
+    if balance_alert_enabled:
+        jobs.add("balance", balance_check_async if engine == "async" else balance_check, balance_alert_schedule,
+                 jitter = min(30, balance_alert_schedule * 0.05), background = True)
+    if order_snapshot is not None:
+        jobs.add("snapshot", save_snapshot, order_snapshot_interval)
+    jobs.add("heartbeat", heartbeat, 1800)
+    return jobs
+
+def get_orders_from(ticker, order_id):
+    # Returns every order with an orderId >= order_id, one page at a time
+    orders = []
+    while True:
+        page = binanceClient.get_all_orders(symbol=ticker, orderId=order_id, limit=orders_page_limit)
+        orders += page
+        if len(page) < orders_page_limit:
+            return orders
+        order_id = page[-1]["orderId"] + 1
+
+def get_orders_incremental(ticker):
+    # Only asks for the orders that can still change or that haven't been seen yet
+    order_store = order_stores[ticker]
+    new_orders_start = order_watermarks[ticker] + 1
+    oldest_pending_id = order_store.oldest_pending_id()
+    if oldest_pending_id is None:
+        return get_orders_from(ticker, new_orders_start)
+
+    orders = binanceClient.get_all_orders(symbol=ticker, orderId=oldest_pending_id, limit=orders_page_limit)
+    if len(orders) < orders_page_limit:
+        return orders
+
+    # Too many settled orders sit between the oldest pending order and the watermark,
+    # so only fetch the new ones and look the pending orders up individually
+    orders = get_orders_from(ticker, new_orders_start)
+    for order_id in list(order_store.pending):
+        orders.append(binanceClient.get_order(symbol=ticker, orderId=order_id))
+    return orders
+
+def get_orders_open(ticker):
+    # Only asks for the open orders, and for the orders that were open last time and aren't anymore to learn
+    # whether they were filled or cancelled. Orders that aren't open yet aren't pending, so they're reported as created
+    # The first time a ticker is polled this way, anything that happened since the order snapshot is caught up on
+    if ticker not in open_order_tickers:
+        orders = get_orders_incremental(ticker)
+        open_order_tickers.add(ticker)
+        return orders
+    open_orders = nedludd0Client.account_get_open_orders(ticker)
+    if open_orders[0] != 'OK':
+        print("-- Warning: Couldn't get the open orders of " + ticker + ", " + str(open_orders[1]).strip() + " --")
+        return None
+    orders = open_orders[1]
+    open_ids = {order["orderId"] for order in orders}
+    for order_id in list(order_stores[ticker].pending):
+        if order_id not in open_ids:
+            orders.append(binanceClient.get_order(symbol=ticker, orderId=order_id))
+    orders.sort(key=lambda order: order["orderId"])
+    return orders
+
+def poll(ticker):
+    # Fetches and categorises the orders of one ticker
+    initial_run = ticker not in order_watermarks
+    all_orders = poll_mode != "open" or initial_run
+    if not all_orders:
+        orders = get_orders_open(ticker)
+        if orders is None:
+            return
+    elif poll_mode == "incremental" and not initial_run:
+        orders = get_orders_incremental(ticker)
+    else:
+        orders = binanceClient.get_all_orders(symbol=ticker)
+    check(ticker, orders, initial_run, all_orders)
+
+def listen(timeout):
+    # Waits up to timeout seconds for order events from the user data stream and categorises them
+    orders = {}
+    for event, order in user_stream.get_events(timeout):
+        if event == STREAM_CONNECTED:
+            # Orders may have changed while the stream was down, so reconcile once over REST
+            for ticker in binance_tickers:
+                orders.setdefault(ticker, []).extend(get_orders_incremental(ticker))
+        elif order["symbol"] in binance_tickers:
+            orders.setdefault(order["symbol"], []).append(order)
+    for ticker in orders:
+        check(ticker, orders[ticker], False)
+
+async def get_orders_from_async(ticker, order_id):
+    # Same as get_orders_from() on the AsyncClient
+    orders = []
+    while True:
+        page = await asyncClient.get_all_orders(symbol=ticker, orderId=order_id, limit=orders_page_limit)
+        orders += page
+        if len(page) < orders_page_limit:
+            return orders
+        order_id = page[-1]["orderId"] + 1
+
+async def get_orders_incremental_async(ticker):
+    # Same as get_orders_incremental() on the AsyncClient, pending orders are looked up concurrently
+    order_store = order_stores[ticker]
+    new_orders_start = order_watermarks[ticker] + 1
+    oldest_pending_id = order_store.oldest_pending_id()
+    if oldest_pending_id is None:
+        return await get_orders_from_async(ticker, new_orders_start)
+
+    orders = await asyncClient.get_all_orders(symbol=ticker, orderId=oldest_pending_id, limit=orders_page_limit)
+    if len(orders) < orders_page_limit:
+        return orders
+
+    orders = await get_orders_from_async(ticker, new_orders_start)
+    orders += await asyncio.gather(*(asyncClient.get_order(symbol=ticker, orderId=order_id) for order_id in list(order_store.pending)))
+    return orders
+
+async def get_orders_open_async(ticker):
+    # Same as get_orders_open() on the AsyncClient, the orders that are no longer open are looked up concurrently
+    if ticker not in open_order_tickers:
+        orders = await get_orders_incremental_async(ticker)
+        open_order_tickers.add(ticker)
+        return orders
+    try:
+        orders = await asyncClient.get_open_orders(symbol=ticker)
+    except BinanceAPIException as e:
+        print("-- Warning: Couldn't get the open orders of " + ticker + ", " + str(e.message).strip() + " --")
+        return None
+    open_ids = {order["orderId"] for order in orders}
+    orders += await asyncio.gather(*(asyncClient.get_order(symbol=ticker, orderId=order_id) for order_id in list(order_stores[ticker].pending) if order_id not in open_ids))
+    orders.sort(key=lambda order: order["orderId"])
+    return orders
+
+async def poll_async(ticker):
+    # Same as poll() on the AsyncClient
+    initial_run = ticker not in order_watermarks
+    all_orders = poll_mode != "open" or initial_run
+    if not all_orders:
+        orders = await get_orders_open_async(ticker)
+        if orders is None:
+            return
+    elif poll_mode == "incremental" and not initial_run:
+        orders = await get_orders_incremental_async(ticker)
+    else:
+        orders = await asyncClient.get_all_orders(symbol=ticker)
+    check(ticker, orders, initial_run, all_orders)
+
+async def poll_metered_async(ticker):
+    # Same as poll_async(), charging the poll the request weight it actually used
+    with rate_limiter.metered() as weight:
+        await poll_async(ticker)
+    poll_scheduler.charge(ticker, weight[0])
+
+async def poll_due_async():
+    # Polls every ticker that's due concurrently, returns how long until the next ticker is due
+    await asyncio.gather(*(poll_metered_async(ticker) for ticker in poll_scheduler.due()))
+    coalescer.flush()
+    return poll_scheduler.time_until_due()
+
+async def listen_async():
+    # Same as listen() for the async engine, waiting for stream events in an executor thread
+    loop = asyncio.get_running_loop()
+    for ticker in binance_tickers:
+        await poll_async(ticker)
+    while True:
+        orders = {}
+        for event, order in await loop.run_in_executor(None, user_stream.get_events, 1):
+            if event == STREAM_CONNECTED:
+                for ticker in binance_tickers:
+                    orders.setdefault(ticker, []).extend(await get_orders_incremental_async(ticker))
+            elif order["symbol"] in binance_tickers:
+                orders.setdefault(order["symbol"], []).append(order)
+        for ticker in orders:
+            check(ticker, orders[ticker], False)
+        coalescer.flush()
+
+async def balance_check_async():
+    # Same as balance_check() on the AsyncClient
+    global balance_check_weight
+    if not rate_limiter.has_room(balance_check_weight, PRIORITY_LOW):
+        print("-- Balance check postponed, request weight is close to the limit --")
+        return 1
+    print("-- Performing balance check --")
+    spent = rate_limiter.spent[PRIORITY_LOW]
+    with rate_limiter.priority(PRIORITY_LOW):
+        balance = await get_balance_async()
+    balance_check_weight = rate_limiter.spent[PRIORITY_LOW] - spent
+    notify("Balance: " + str(format(balance, '.2f')) + " " + currency)
+    print("Balance notification queued")
+
+async def run_async():
+    # Async engine, every task shares one AsyncClient session and the process wide rate limiter
+    global asyncClient
+    asyncClient = await get_client_class(AsyncClient).create(binance_api_key, binance_api_secret, requests_params = {"timeout": 20})
+    rate_limiter.attach_async(asyncClient)
+    if api_recorder is not None:
+        api_recorder.attach_async(asyncClient)
+    if metrics_port:
+        asyncClient.get_all_orders = metrics_histograms['get_all_orders'].time(asyncClient.get_all_orders)
+    tasks = [dispatcher.run_async(), create_jobs().run_async()]
+    if poll_mode == "stream":
+        tasks.append(listen_async())
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await asyncClient.close_connection()
+
+def check(ticker, orders, initial_run, all_orders = False):
+    # Categorises orders through the ticker's order store
+    # complete: Orders that have been completed (filled or cancelled)
+    # pending: Orders that are currently in progress (unfilled)
+    # all_orders: orders is an allOrders response (full or incremental poll), only the orders that changed since
+    # the last one are categorised, usually none. Stream events and open orders aren't a contiguous range of
+    # orderIds, so they're categorised in full
+
+    if all_orders:
+        orders, events = order_stores[ticker].update_response(orders)
+    else:
+        events = order_stores[ticker].update(orders)
+
+    # Move the watermark forward, incremental polling carries on from there
+    order_watermark = order_watermarks.get(ticker, 0)
+    for order in orders:
+        if order["orderId"] > order_watermark:
+            order_watermark = order["orderId"]
+    order_watermarks[ticker] = order_watermark
+
+    # Only name the ticker in notifications when there's more than one
+    prefix = ticker + " " if len(binance_tickers) > 1 else ""
+
+    for event, order in events:
+        if event == ORDER_FILLED:
+            # Notify if a pending order is filled
+            notify(prefix + "Order filled! " + str(float(order["executedQty"])) + "@" + str(float(order["price"])), event)
+            print("Order " + str(order["orderId"]) + " filled")
+        elif event == ORDER_CANCELLED:
+            # Notify if a pending order is cancelled
+            notify(prefix + "Order " + str(order["orderId"]) + " cancelled successfully " + str(float(order["origQty"])) + "@" + str(float(order["price"])), event)
+            print("Order " + str(order["orderId"]) + " cancelled")
+
+        if event in (ORDER_FILLED, ORDER_CANCELLED, ORDER_CLOSED, ORDER_COMPLETED):
+            print("Categorised " + str(order["orderId"]) + " as completed")
+        else:
+            print("Categorised " + str(order["orderId"]) + " as pending")
+
+        if not initial_run:
+            # If this isn't the first loop, notify about orders that weren't seen before
+            if event == ORDER_COMPLETED:
+                notify(prefix + "Order " + str(order["orderId"]) + " filled! " + str(float(order["origQty"])) + "@" + str(float(order["price"])), event)
+            elif event == ORDER_CREATED:
+                notify(prefix + "Order " + str(order["orderId"]) + " created successfully " + str(float(order["origQty"])) + "@" + str(float(order["price"])), event)
 
 if __name__ == "__main__":
     # Configuration variables
     binance_api_key        = environ['BINANCE_API_KEY']
     binance_api_secret     = environ['BINANCE_API_SECRET']
-    binance_ticker         = environ['BINANCE_TICKER']
+    binance_tickers        = get_tickers_config()
     notifier_api_app       = environ['NOTIFIER_API_APP']
     notifier_api_user      = environ['NOTIFIER_API_USER']
     notifier_protocol      = environ['NOTIFIER_PROTOCOL']
@@ -127,38 +627,132 @@ if __name__ == "__main__":
     currency               = get_currency_config()
     balance_alert_schedule = get_balance_alert_config("schedule")
     balance_alert_enabled  = get_balance_alert_config("enabled")
+    balance_prices         = get_balance_prices_config()
+    balance_vectorized     = get_balance_vectorized_config()
+    poll_mode              = get_poll_mode_config()
+    notify_mode            = get_notify_mode_config()
+    notify_urgent          = get_notify_urgent_config()
+    notify_digest_window   = get_notify_digest_window_config()
+    notify_shutdown_timeout= 10 # Seconds to wait for queued notifications to be sent when stopping
+    poll_weight_budget     = get_budget_config('POLL_WEIGHT_BUDGET', 0.5)
+    balance_weight_budget  = get_budget_config('BALANCE_WEIGHT_BUDGET', 0.8)
+    orders_page_limit      = 1000 # Maximum allowed by the allOrders endpoint
+    orders_weight          = 3 if poll_mode == "open" else 10 # Request weight of the openOrders (for one symbol) or allOrders endpoint
+    complete_orders_limit  = get_retention_config('COMPLETE_ORDERS_LIMIT', 10000)
+    complete_orders_age    = get_retention_config('COMPLETE_ORDERS_MAX_AGE', None)
+    binance_stream_url     = environ.get('BINANCE_STREAM_URL', "wss://stream.binance.com:9443/")
+    binance_api_url        = environ.get('BINANCE_API_URL', "") # Empty uses api.binance.com
+    engine                 = get_engine_config()
+    order_snapshot_path    = environ.get('ORDER_SNAPSHOT', "orders.db") # Empty disables snapshots
+    order_snapshot_interval= get_snapshot_interval_config()
+    metrics_port           = get_metrics_port_config()
+    profile_api_path       = environ.get('PROFILE_API', "") # Chrome trace file for BinanceAPI calls, empty disables profiling
+    record_api_path        = environ.get('RECORD_API', "") # Gzipped JSONL file of API responses for tools/replay.py, empty disables recording
 
     
     print("-- Preparing --")
-    # Create objects
-    binanceClient = Client(binance_api_key, binance_api_secret)
-    appriseClient = Apprise()
-    appriseClient.add(notifier_protocol + "://" + notifier_api_user + '@' + notifier_api_app)
+    # Create objects, the dispatcher first so Apprise gets set up while connecting to Binance
+    metrics_registry, metrics_histograms = create_metrics()
+    dispatcher = NotificationDispatcher(apprise_factory = create_apprise, delivery_time = metrics_histograms['delivery'], latency_time = metrics_histograms['latency'])
+    if engine == "sync":
+        dispatcher.start()
+    else:
+        # The async engine delivers from its event loop, which only starts once everything else is ready
+        Thread(target=dispatcher.prepare, name="notifier_prepare", daemon=True).start()
+    binanceClient = create_client()
+    api_recorder = create_recorder() if record_api_path else None
+    if api_recorder is not None:
+        api_recorder.attach(binanceClient)
+        print("Recording API responses to " + record_api_path)
+    api_profiler = CallProfiler() if profile_api_path else None
+    nedludd0Client = BinanceAPI(p_client = binanceClient, p_wallet = 'spot', p_profiler = api_profiler)
+    weight_limit, weight_interval = parse_weight_limit(nedludd0Client.general_get_rate_limits())
+    rate_limiter = RateLimiter(weight_limit, weight_interval, low_priority_budget = balance_weight_budget)
+    rate_limiter.attach(binanceClient)
+    coalescer = NotificationCoalescer(dispatcher, notify_digest_window)
 
     if balance_alert_enabled:
         print("Balance alert is enabled and set to run every " + str(balance_alert_schedule) + " seconds")
         print("Currency is set to " + currency)
+        print("Balance is valued at " + balance_prices + " prices")
+        if balance_vectorized and balance_prices == "snapshot":
+            print("Balance is valued with " + balance_vectorized + " array operations")
     else:
         print("Balance alert is disabled")
+    print("Poll mode is set to " + poll_mode)
+    print("Notify mode is set to " + notify_mode)
+    print("Engine is set to " + engine)
+
+    # Share the request weight budget between tickers
+    poll_scheduler = PollScheduler(binance_tickers, weight_limit, weight_interval, poll_weight_budget, orders_weight)
+    for ticker in binance_tickers:
+        print("Monitoring " + ticker + " every " + str(format(poll_scheduler.intervals[ticker], '.1f')) + " seconds")
+    print("Polling uses a request weight of about " + str(round(poll_scheduler.weight_per_minute())) + " per minute out of " + str(weight_limit) + " per " + str(weight_interval) + " seconds")
 
     print("-- Monitoring trades --")
     # Start monitoring
-    pending_orders  = []
-    complete_orders = []
-    initial_run = True
-    loops = 0
-    while True:
-        all_orders = binanceClient.get_all_orders(symbol=binance_ticker)
-        check(all_orders)
-        initial_run = False
-        sleep(1) # Can be changed if near instant notifications aren't necessary, and you're making too many API requests
-        loops += 1
-        if loops%1800 == 0:
-            # Display "something" in the terminal so that users know it's still working
-            print("-- Still monitoring --")
-        if balance_alert_enabled:
-            if loops%balance_alert_schedule == 0:
-                # Send current wallet balance
-                print("-- Performing balance check --")
-                notify("Balance: " + str(format(get_balance(), '.2f')) + " " + currency)
-                print("Balance notification sent")
+    order_stores = {}
+    for ticker in binance_tickers:
+        order_stores[ticker] = OrderStore(max_complete = complete_orders_limit, max_complete_age = complete_orders_age)
+    order_watermarks = {} # Highest orderId seen so far per ticker, only set once a ticker has had its initial run
+    open_order_tickers = set() # Tickers polled over the openOrders endpoint since starting
+    order_snapshot = None
+    if order_snapshot_path:
+        # Tickers found in the snapshot skip their initial run, so orders that changed while stopped get notified
+        order_snapshot = OrderSnapshot(order_snapshot_path, binance_api_key)
+        for ticker, (order_watermark, state) in order_snapshot.load(binance_tickers).items():
+            order_stores[ticker].set_state(state)
+            order_watermarks[ticker] = order_watermark
+            print("Resuming " + ticker + " from the order snapshot, " + str(len(state['pending'])) + " pending orders")
+    signal.signal(signal.SIGTERM, stop)
+    if metrics_port:
+        # Time the calls behind the histograms, the async engine wraps its own client once it's created
+        binanceClient.get_all_orders = metrics_histograms['get_all_orders'].time(binanceClient.get_all_orders)
+        check = metrics_histograms['check'].time(check)
+        get_balance = metrics_histograms['balance'].time(get_balance)
+        MetricsServer(metrics_registry, metrics_port).start()
+        print("Serving metrics on port " + str(metrics_port) + " at /metrics")
+    balance_check_weight = 0 # Request weight the last balance check used
+    if poll_mode == "stream":
+        # Only imported when needed, websockets comes with python-binance
+        from user_stream import UserStream, STREAM_CONNECTED
+        user_stream = UserStream(binanceClient, binance_stream_url)
+        if api_recorder is not None:
+            api_recorder.attach_stream(user_stream)
+        user_stream.start()
+    try:
+        if engine == "async":
+            asyncio.run(run_async())
+        else:
+            jobs = create_jobs()
+            if poll_mode == "stream":
+                # Initial run over REST, the stream takes over from there
+                for ticker in binance_tickers:
+                    poll(ticker)
+            while True:
+                timeout = jobs.time_until_due()
+                if poll_mode == "stream":
+                    # Categorise stream events as soon as they arrive while waiting for the next job, waking
+                    # at least once a second so a digest is sent once its window has passed
+                    listen(min(timeout, 1))
+                    coalescer.flush()
+                else:
+                    sleep(timeout)
+                jobs.run_pending()
+    finally:
+        # Deliver what's left before the snapshot marks those orders as notified, the async engine's
+        # dispatcher stopped with the event loop so its queue is handed to a dispatcher thread
+        coalescer.flush(force = True)
+        if dispatcher.thread is None:
+            dispatcher.start()
+        if not dispatcher.drain(notify_shutdown_timeout):
+            print("-- " + str(dispatcher.queue_depth()) + " notifications could not be sent before stopping --")
+        save_snapshot()
+        print("-- Order state saved --" if order_snapshot is not None else "-- Stopped --")
+        if api_profiler is not None:
+            print_api_profile()
+            api_profiler.write_trace(profile_api_path)
+            print("BinanceAPI trace written to " + profile_api_path)
+        if api_recorder is not None:
+            api_recorder.close()
+            print(str(api_recorder.records) + " API responses recorded to " + record_api_path)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# Benchmark for the per-tick cost of categorising orders
+# Compares the old nested list scan from check() against OrderStore as the
+# order history grows, for both a full history tick and an incremental tick, and
+# what's left of a full history tick when the response hasn't changed since the last one
+# OrderStore.update() makes a full history tick linear in the history instead of quadratic, it still grows
+# with it. Only incremental polling and unchanged responses (update_response()) cost the same at any size
+#
+# Usage: python3 tools/bench_order_store.py [history sizes...]
+
+import sys
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+from order_store import OrderStore
+
+PENDING = 50   # Open orders at any time, typical for a grid strategy
+TICKS   = 20   # Ticks timed per measurement
+LEGACY_MAX_HISTORY = 5000 # The nested scan gets too slow to time past this
+
+def make_orders(history):
+    # Synthetic history: `history` settled orders followed by PENDING open ones
+    orders = []
+    for order_id in range(1, history + PENDING + 1):
+        status = "FILLED" if order_id <= history else "NEW"
+        orders.append({"orderId": order_id, "status": status, "origQty": "1.0", "executedQty": "1.0", "price": "1.0"})
+    return orders
+
+def legacy_check(orders, pending_orders, complete_orders):
+    # The categorisation loop check() used before OrderStore, without notifications
+    for order in orders:
+        known = False
+        for pending in pending_orders:
+            if order["orderId"] == pending["orderId"]:
+                known = True
+                if order["status"] != "NEW":
+                    complete_orders.append(order)
+                    for i in range(len(pending_orders)):
+                        if pending_orders[i]["orderId"] == order["orderId"]:
+                            del pending_orders[i]
+                            break
+        for complete in complete_orders:
+            if order["orderId"] == complete["orderId"]:
+                known = True
+        if not known:
+            if order["status"] != "NEW":
+                complete_orders.append(order)
+            else:
+                pending_orders.append(order)
+
+def time_ticks(tick, ticks = TICKS):
+    # Average wall time of one tick in microseconds
+    start = perf_counter()
+    for _ in range(ticks):
+        tick()
+    return (perf_counter() - start) / ticks * 1e6
+
+def bench(history):
+    orders      = make_orders(history)
+    incremental = orders[-PENDING:] # What POLL_MODE=incremental hands to check() when nothing changed
+    results     = {}
+
+    store = OrderStore(max_complete = None)
+    store.update(orders)
+    results["store_full"]        = time_ticks(lambda: store.update(orders))
+    results["store_incremental"] = time_ticks(lambda: store.update(incremental))
+
+    store = OrderStore(max_complete = None)
+    store.update_response(orders)
+    results["store_unchanged"]   = time_ticks(lambda: store.update_response(orders))
+
+    if history <= LEGACY_MAX_HISTORY:
+        pending_orders  = []
+        complete_orders = []
+        legacy_check(orders, pending_orders, complete_orders)
+        results["legacy_full"] = time_ticks(lambda: legacy_check(orders, pending_orders, complete_orders), 2)
+
+    return results
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [100, 1000, 5000, 10000, 100000]
+    columns = ["legacy_full", "store_full", "store_incremental", "store_unchanged"]
+    print("history".rjust(8) + "".join(column.rjust(20) for column in columns) + "   (us per tick)")
+    for history in sizes:
+        results = bench(history)
+        row = str(history).rjust(8)
+        for column in columns:
+            row += (format(results[column], '.1f') if column in results else "-").rjust(20)
+        print(row)
+    print("store_full grows linearly with the history, store_incremental and store_unchanged don't")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Startup benchmark
+# Measures how long start.py takes to import its dependencies and to finish its first poll, running it
+# against tools/mock_exchange.py, so regressions in cold start time show up before they ship
+#
+# Usage: python3 tools/bench_startup.py [--runs 5] [--json results.json]
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from os import path
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+from mock_exchange import MockExchange, TICKER
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# Lines start.py prints at each stage, in order
+STAGES = [
+    ("imports",     "-- Preparing --"),         # Interpreter started and start.py imported
+    ("setup",       "-- Monitoring trades --"), # Clients created, exchange info loaded
+    ("first_poll",  "Categorised "),            # First orders categorised
+]
+
+def import_times():
+    # Cumulative import time of start.py and of its slowest direct imports, in ms, from python -X importtime
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import start"], cwd=ROOT, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1000))
+        except ValueError:
+            continue # Header line
+    # Modules are listed after everything they import, so start's direct imports are the ones
+    # one level deeper right before it
+    modules = {}
+    total = None
+    for position, (depth, name, cumulative) in enumerate(entries):
+        if name == "start" and depth == 1:
+            total = cumulative
+            for child_depth, child, child_cumulative in reversed(entries[:position]):
+                if child_depth == 1:
+                    break
+                if child_depth == 3:
+                    modules[child] = child_cumulative
+    return total, modules
+
+def startup_times(exchange_url):
+    # Seconds from launching start.py until it prints each stage
+    environment = dict(os.environ,
+        BINANCE_API_KEY     = "bench-key",
+        BINANCE_API_SECRET  = "bench-secret",
+        BINANCE_API_URL     = exchange_url + "/api",
+        BINANCE_TICKER      = TICKER,
+        NOTIFIER_API_APP    = "localhost",
+        NOTIFIER_API_USER   = "bench",
+        NOTIFIER_PROTOCOL   = "json",
+        BALANCE_ALERT       = "off",
+        ORDER_SNAPSHOT      = "",
+    )
+    times = {}
+    started = perf_counter()
+    process = subprocess.Popen([sys.executable, "-u", "start.py"], cwd=ROOT, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        for line in process.stdout:
+            for stage, marker in STAGES:
+                if stage not in times and line.startswith(marker):
+                    times[stage] = perf_counter() - started
+            if len(times) == len(STAGES):
+                break
+    finally:
+        process.kill()
+        process.wait()
+    if len(times) != len(STAGES):
+        raise RuntimeError("start.py exited before its first poll")
+    return times
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure start.py import time and time to first poll")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--json", help="also write the results to this file as JSON, - for stdout")
+    args = parser.parse_args()
+
+    imports = [import_times() for _ in range(args.runs)]
+    with MockExchange(100, 5, args.port) as exchange:
+        startups = [startup_times(exchange.url) for _ in range(args.runs)]
+
+    results = {
+        "import_ms":    statistics.median(total for total, modules in imports),
+        "modules_ms":   dict(sorted(imports[-1][1].items(), key=lambda item: item[1], reverse=True)[:10]),
+    }
+    for stage, marker in STAGES:
+        results[stage + "_ms"] = statistics.median(startup[stage] for startup in startups) * 1e3
+
+    print("start.py import".ljust(28) + format(results["import_ms"], '.0f').rjust(8) + " ms")
+    for module, cumulative in results["modules_ms"].items():
+        print(("  " + module).ljust(28) + format(cumulative, '.0f').rjust(8) + " ms")
+    for stage, marker in STAGES:
+        print(("until " + stage).ljust(28) + format(results[stage + "_ms"], '.0f').rjust(8) + " ms")
+    print("(median of " + str(args.runs) + " runs)")
+
+    if args.json:
+        output = json.dumps({"python": platform.python_version(), "runs": args.runs, "results": results}, indent=1)
+        if args.json == "-":
+            print(output)
+        else:
+            with open(args.json, "w") as f:
+                f.write(output + "\n")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+# Benchmark suite for the order polling and balance valuation paths, run against tools/mock_exchange.py
+# Reports per tick wall time, CPU time, peak memory allocated and REST requests made, so runs on
+# different commits can be compared
+#
+# Usage: python3 tools/bench_suite.py [--orders 100 1000 ...] [--assets 5 50 ...] [--json results.json]
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from os import path
+from time import perf_counter, process_time
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+sys.path.insert(0, path.dirname(path.abspath(__file__)))
+import start
+from mock_exchange import MockExchange, mock_client, TICKER
+from my_class import BinanceAPI, numpy
+from notifier import NotificationDispatcher
+from order_store import OrderStore
+
+COLUMNS = ["wall_ms", "cpu_ms", "alloc_peak_kib", "requests"]
+
+def measure(tick, exchange, ticks):
+    # Average cost of one tick, allocations are measured on a separate tick as tracing slows everything down
+    exchange.stats()
+    wall_start, cpu_start = perf_counter(), process_time()
+    for _ in range(ticks):
+        tick()
+    wall, cpu = perf_counter() - wall_start, process_time() - cpu_start
+    requests = sum(exchange.stats().values())
+
+    tracemalloc.start()
+    tick()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "wall_ms":          wall / ticks * 1e3,
+        "cpu_ms":           cpu / ticks * 1e3,
+        "alloc_peak_kib":   peak / 1024,
+        "requests":         requests / ticks,
+    }
+
+def prepare_start(client, poll_mode):
+    # The module globals start.py sets up in its main block, for a single ticker
+    start.binanceClient     = client
+    start.binance_tickers   = {TICKER: 1}
+    start.order_stores      = {TICKER: OrderStore(max_complete = None)}
+    start.order_watermarks  = {}
+    start.orders_page_limit = 1000
+    start.poll_mode         = poll_mode
+    start.notify_mode       = "event"
+    start.notify_urgent     = []
+    start.dispatcher        = NotificationDispatcher(None) # Never started, notifications just queue up
+
+def bench_orders(history, port, ticks):
+    results = []
+    with MockExchange(history, 0, port) as exchange:
+        client = mock_client(exchange.url)
+
+        # Every tick is a start.poll(), the same request and check() a running notifier makes, after the initial run
+        # full: the latest allOrders page, incremental: only orders from the oldest pending one onwards
+        for poll_mode in ("full", "incremental"):
+            prepare_start(client, poll_mode)
+            start.poll(TICKER)
+            results.append(dict(scenario = "orders_" + poll_mode, size = history, **measure(lambda: start.poll(TICKER), exchange, ticks)))
+    return results
+
+def bench_balance(assets, empty, port, ticks):
+    results = []
+    with MockExchange(0, assets, port, empty) as exchange:
+        nedludd0Client = BinanceAPI(p_client = mock_client(exchange.url), p_wallet = 'spot')
+        nedludd0Client.general_get_exchange_info()
+        for balance_prices in ("snapshot", "average"):
+            tick = lambda: nedludd0Client.account_get_balance_total(p_price_snapshot = balance_prices == "snapshot")
+            results.append(dict(scenario = "balance_" + balance_prices, size = assets, **measure(tick, exchange, ticks)))
+        if numpy is not None:
+            for balance_vectorized in ("exact", "float"):
+                tick = lambda: nedludd0Client.account_get_balance_total(p_price_snapshot = True, p_vectorized = balance_vectorized)
+                results.append(dict(scenario = "balance_numpy_" + balance_vectorized, size = assets, **measure(tick, exchange, ticks)))
+    return results
+
+def print_table(results):
+    print("scenario".ljust(20) + "size".rjust(8) + "".join(column.rjust(16) for column in COLUMNS))
+    for result in results:
+        print(result["scenario"].ljust(20) + str(result["size"]).rjust(8) + "".join(format(result[column], '.2f').rjust(16) for column in COLUMNS))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark order polling and balance valuation against a mock exchange")
+    parser.add_argument("--orders", type=int, nargs="*", default=[100, 1000, 10000, 100000], help="order history sizes")
+    parser.add_argument("--assets", type=int, nargs="*", default=[5, 50, 500], help="numbers of assets held")
+    parser.add_argument("--empty", type=int, default=500, help="assets with a zero balance listed alongside the ones held")
+    parser.add_argument("--ticks", type=int, default=5, help="ticks timed per measurement")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--json", help="also write the results to this file as JSON, - for stdout")
+    args = parser.parse_args()
+
+    results = []
+    # check() prints a line per order, which would measure the terminal rather than the code
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for history in args.orders:
+            results += bench_orders(history, args.port, args.ticks)
+        for assets in args.assets:
+            results += bench_balance(assets, args.empty, args.port, args.ticks)
+
+    print_table(results)
+    if args.json:
+        output = json.dumps({"python": platform.python_version(), "ticks": args.ticks, "results": results}, indent=1)
+        if args.json == "-":
+            print(output)
+        else:
+            with open(args.json, "w") as f:
+                f.write(output + "\n")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+# Local stand-in for the Binance REST API
+# Serves a synthetic order history and account from memory, enough of the API for start.py and
+# BinanceAPI to run against it, and counts the requests it gets so benchmarks can report them
+#
+# Serve 10000 orders for BENCHUSDT and an account holding 50 assets on http://localhost:8766/api
+#   python3 tools/mock_exchange.py --orders 10000 --assets 50
+# Point a python-binance Client at it with mock_client() below
+
+import argparse
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Process
+from socketserver import ThreadingMixIn
+from time import sleep
+from urllib.parse import urlparse, parse_qs
+from urllib.request import urlopen
+
+TICKER  = "BENCHUSDT"
+PENDING = 50 # Open orders at the end of the history, typical for a grid strategy
+
+def make_orders(history, pending = PENDING, symbol = TICKER):
+    # `history` settled orders followed by `pending` open ones, orderIds start at 1
+    orders = []
+    for order_id in range(1, history + pending + 1):
+        settled = order_id <= history
+        orders.append({
+            "symbol":        symbol,
+            "orderId":       order_id,
+            "clientOrderId": "bench" + str(order_id),
+            "price":         "1.00000000",
+            "origQty":       "1.00000000",
+            "executedQty":   "1.00000000" if settled else "0.00000000",
+            "status":        "FILLED" if settled else "NEW",
+            "type":          "LIMIT",
+            "side":          "BUY" if order_id % 2 else "SELL",
+            "time":          1600000000000 + order_id,
+            "updateTime":    1600000000000 + order_id,
+        })
+    return orders
+
+def make_market(assets, empty = 0):
+    # An account holding BTC, USDT and `assets` altcoins, each altcoin tradable against BTC and USDT,
+    # plus `empty` assets with a zero balance like the spot account lists for every asset Binance has
+    balances = [{"asset": "BTC", "free": "1.00000000", "locked": "0.50000000"},
+                {"asset": "USDT", "free": "1000.00000000", "locked": "0.00000000"}]
+    prices   = {"BTCUSDT": "40000.00000000", "BTCBUSD": "40000.00000000", TICKER: "1.00000000"}
+    for number in range(assets):
+        asset = "A" + str(number).zfill(3)
+        balances.append({"asset": asset, "free": "10.00000000", "locked": "1.00000000"})
+        prices[asset + "BTC"]  = format(0.00001 * (number + 1), '.8f')
+        prices[asset + "USDT"] = format(0.4 * (number + 1), '.8f')
+    for number in range(empty):
+        balances.append({"asset": "Z" + str(number).zfill(3), "free": "0.00000000", "locked": "0.00000000"})
+    symbols = [{"symbol": symbol, "status": "TRADING", "filters": [
+                   {"filterType": "PRICE_FILTER", "minPrice": "0.00000001", "maxPrice": "1000000.00000000", "tickSize": "0.00000001"},
+                   {"filterType": "LOT_SIZE", "minQty": "0.00100000", "maxQty": "900000.00000000", "stepSize": "0.00100000"}]}
+               for symbol in prices]
+    return balances, prices, symbols
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+def serve(history, assets, port, host = "localhost", empty = 0):
+    orders                      = make_orders(history)
+    balances, prices, symbols   = make_market(assets, empty)
+    exchange_info               = {"timezone": "UTC", "symbols": symbols, "rateLimits": [
+                                      {"rateLimitType": "REQUEST_WEIGHT", "interval": "MINUTE", "intervalNum": 1, "limit": 1200}]}
+    requests                    = {}
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url     = urlparse(self.path)
+            params  = {key: values[0] for key, values in parse_qs(url.query).items()}
+            path    = url.path.split("/api/", 1)[-1].split("/", 1)[-1] # eg. /api/v3/allOrders -> allOrders
+
+            if url.path == "/stats":
+                # Requests served since the last call, not counted itself
+                self.reply(dict(requests))
+                requests.clear()
+                return
+            requests[path] = requests.get(path, 0) + 1
+
+            if path in ("ping", "time"):
+                self.reply({"serverTime": 1600000000000})
+            elif path == "exchangeInfo":
+                self.reply(exchange_info)
+            elif path == "allOrders":
+                # Like Binance: from orderId onwards when given, otherwise the most recent orders
+                limit = min(int(params.get("limit", 500)), 1000)
+                if "orderId" in params:
+                    start = max(0, int(params["orderId"]) - 1)
+                    self.reply(orders[start:start + limit])
+                else:
+                    self.reply(orders[-limit:])
+            elif path == "order":
+                self.reply(orders[int(params["orderId"]) - 1])
+            elif path == "openOrders":
+                self.reply([order for order in orders[-PENDING:] if order["status"] == "NEW"])
+            elif path == "account":
+                self.reply({"balances": balances})
+            elif path == "ticker/price":
+                if "symbol" in params:
+                    self.reply({"symbol": params["symbol"], "price": prices[params["symbol"]]})
+                else:
+                    self.reply([{"symbol": symbol, "price": price} for symbol, price in prices.items()])
+            elif path == "avgPrice":
+                self.reply({"mins": 5, "price": prices[params["symbol"]]})
+            else:
+                self.reply({"code": -1, "msg": "Not served by the mock exchange: " + url.path}, 404)
+
+        def reply(self, body, status = 200):
+            body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    ThreadingHTTPServer((host, port), Handler).serve_forever()
+
+class MockExchange:
+    # Runs the server in its own process, so its CPU time doesn't count towards the client's
+
+    def __init__(self, history, assets, port = 8766, empty = 0):
+
+        self.history    = history
+        self.assets     = assets
+        self.empty      = empty
+        self.port       = port
+        self.url        = "http://localhost:" + str(port)
+
+        # Working
+        self.process    = None
+
+    def __enter__(self):
+        self.process = Process(target=serve, args=(self.history, self.assets, self.port, "localhost", self.empty), daemon=True)
+        self.process.start()
+        for _ in range(100):
+            try:
+                self.stats()
+                return self
+            except OSError:
+                sleep(0.05)
+        raise RuntimeError("Mock exchange did not start on port " + str(self.port))
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+    # Requests served per endpoint since the last call
+    def stats(self):
+        with urlopen(self.url + "/stats") as response:
+            return json.loads(response.read())
+
+def mock_client(url):
+    # python-binance Client talking to the mock exchange instead of api.binance.com
+    from binance.client import Client
+
+    class MockClient(Client):
+        API_URL = url + "/api"
+
+    return MockClient("bench-key", "bench-secret")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic Binance order history and account")
+    parser.add_argument("--orders", type=int, default=1000, help="settled orders in the history of " + TICKER)
+    parser.add_argument("--assets", type=int, default=5, help="altcoins held besides BTC and USDT")
+    parser.add_argument("--empty", type=int, default=0, help="assets listed with a zero balance")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    print("Serving " + str(args.orders) + " orders and " + str(args.assets) + " assets on http://localhost:" + str(args.port) + "/api")
+    try:
+        serve(args.orders, args.assets, args.port, empty = args.empty)
+    except KeyboardInterrupt:
+        sys.exit(0)
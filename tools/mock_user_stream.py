@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Local stand-in for the Binance user data stream
+# Replays recorded stream messages (one JSON message per line) to every client that connects,
+# and can drop the connection part way through to exercise reconnects and REST reconciliation
+#
+# Serve a recording, then run start.py with POLL_MODE=stream and BINANCE_STREAM_URL=ws://localhost:8765/
+#   python3 tools/mock_user_stream.py tools/user_stream_events.jsonl
+# Or check UserStream against it without touching Binance at all
+#   python3 tools/mock_user_stream.py tools/user_stream_events.jsonl --self-test
+
+import argparse
+import asyncio
+import json
+import sys
+from os import path
+from time import monotonic
+
+import websockets
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+from user_stream import UserStream, STREAM_CONNECTED
+
+def load_messages(recording):
+    with open(recording) as f:
+        return [line.strip() for line in f if line.strip()]
+
+async def serve(messages, host, port, interval, drop_after):
+    connections = 0
+
+    async def replay(socket, path = None):
+        nonlocal connections
+        connections += 1
+        # Only the first connection gets dropped, so a reconnect replays the whole recording
+        drop = drop_after if connections == 1 else None
+        for sent, message in enumerate(messages):
+            if drop is not None and sent == drop:
+                print("Dropping connection after " + str(sent) + " messages")
+                await socket.close()
+                return
+            await socket.send(message)
+            await asyncio.sleep(interval)
+        await socket.wait_closed()
+
+    return await websockets.serve(replay, host, port)
+
+class ListenKeyStandIn:
+    # Answers the two REST calls UserStream makes, in place of a python-binance Client
+    def stream_get_listen_key(self):
+        return "mock-listen-key"
+
+    def stream_keepalive(self, listen_key):
+        return {}
+
+def self_test(messages, port, drop_after):
+    # Connect a UserStream to the stand-in server and print what it hands to start.py
+    stream = UserStream(ListenKeyStandIn(), "ws://localhost:" + str(port) + "/", reconnect_delay = 0.5)
+    stream.start()
+    expected_connections = 2 if drop_after is not None else 1
+    connections = 0
+    deadline = monotonic() + 10
+    while monotonic() < deadline:
+        for event, order in stream.get_events(timeout = 0.5):
+            if event == STREAM_CONNECTED:
+                connections += 1
+                print("connected (" + str(connections) + ")")
+            else:
+                print(json.dumps(order))
+        if connections >= expected_connections and stream.events.empty():
+            deadline = min(deadline, monotonic() + 1)
+    return connections >= expected_connections
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Binance user data stream messages")
+    parser.add_argument("recording")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between messages")
+    parser.add_argument("--drop-after", type=int, default=None, help="close the first connection after this many messages")
+    parser.add_argument("--self-test", action="store_true", help="connect a UserStream and print the orders it produces")
+    args = parser.parse_args()
+
+    messages = load_messages(args.recording)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(serve(messages, args.host, args.port, args.interval, args.drop_after))
+    print("Replaying " + str(len(messages)) + " messages on ws://" + args.host + ":" + str(args.port) + "/")
+
+    if args.self_test:
+        from threading import Thread
+        Thread(target=loop.run_forever, daemon=True).start()
+        sys.exit(0 if self_test(messages, args.port, args.drop_after) else 1)
+    loop.run_forever()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# Replays a recording made with RECORD_API (see api_recorder.py) through start.py, without touching the exchange
+# Polls, balance checks and user data stream events happen in the order they were recorded, every request is
+# answered with the response recorded for it and notifications are collected instead of sent, so the same
+# recording always gives the same notifications (as long as NOTIFY_DIGEST_WINDOW was 0)
+#
+# Usage: python3 tools/replay.py recording.jsonl.gz [--speed 1] [--notifications out.txt] [--json results.json]
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+from collections import defaultdict, deque
+from os import path
+from time import perf_counter, process_time, sleep
+from urllib.parse import urlparse
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+import start
+from api_recorder import read_recording, request_key, request_params
+from binance.client import Client
+from binance.exceptions import BinanceAPIException
+from my_class import BinanceAPI
+from notifier import NotificationDispatcher, NotificationCoalescer
+from order_store import OrderStore
+from rate_limiter import RateLimiter
+from user_stream import STREAM_CONNECTED
+
+class ReplayMissing(Exception):
+    # The replay asked for something the recording doesn't have, eg. because the code under test changed
+    pass
+
+class ReplayClient(Client):
+    # python-binance Client answering every request with the next response recorded for it
+
+    def __init__(self, records):
+        self.responses = defaultdict(deque)
+        for record in records:
+            if "path" in record:
+                self.responses[request_key(record["method"], record["path"], record["params"])].append(record)
+        super().__init__("replay-key", "replay-secret")
+
+    def _request(self, method, uri, signed, force_params = False, **kwargs):
+        key = request_key(method, urlparse(uri).path, request_params(kwargs))
+        if not self.responses[key]:
+            if uri.endswith(("/ping", "/time")):
+                return {} # Client() pings on creation, recordings start after that
+            raise ReplayMissing(key)
+        record = self.responses[key].popleft()
+        record["replayed"] = True
+        if "error" in record:
+            raise BinanceAPIException(None, record["error"]["status_code"], record["error"]["text"])
+        return record["response"]
+
+class ReplayUserStream:
+    # Hands start.listen() the batch of user data stream events being replayed
+
+    def __init__(self):
+        self.batch = []
+
+    def get_events(self, timeout = None):
+        events, self.batch = self.batch, []
+        return events
+
+class CollectingApprise:
+    # Stands in for Apprise, keeps the notifications instead of sending them
+
+    def __init__(self):
+        self.notifications = []
+
+    def notify(self, body, title):
+        self.notifications.append(body)
+        return True
+
+def prepare_start(meta, client, apprise):
+    # The module globals start.py sets up in its main block, from the configuration the recording was made with
+    start.binanceClient     = client
+    start.binance_tickers   = meta["tickers"]
+    start.currency          = meta.get("currency", "AUD")
+    start.poll_mode         = meta.get("poll_mode", "incremental")
+    start.notify_mode       = meta.get("notify_mode", "digest")
+    start.notify_urgent     = meta.get("notify_urgent", [])
+    start.balance_prices    = meta.get("balance_prices", "snapshot")
+    start.balance_vectorized= meta.get("balance_vectorized")
+    start.orders_page_limit = meta.get("orders_page_limit", 1000)
+    start.order_stores      = {ticker: OrderStore(max_complete = meta.get("complete_orders_limit", 10000), max_complete_age = meta.get("complete_orders_age"))
+                               for ticker in start.binance_tickers}
+    start.order_watermarks  = {}
+    start.open_order_tickers= set()
+    start.dispatcher        = NotificationDispatcher(apprise)
+    start.coalescer         = NotificationCoalescer(start.dispatcher, meta.get("notify_digest_window", 0))
+    start.nedludd0Client    = BinanceAPI(p_client = client, p_wallet = 'spot')
+    start.rate_limiter      = RateLimiter()
+    start.user_stream       = ReplayUserStream()
+    start.STREAM_CONNECTED  = STREAM_CONNECTED
+    start.dispatcher.start()
+
+def replay(records, speed):
+    # Drives start.py in recorded order, speed 0 goes as fast as possible, 1 at recorded speed
+    steps = {"polls": 0, "balance_checks": 0, "stream_batches": 0, "missing": 0}
+    started = perf_counter()
+    for record in records:
+        if record.get("replayed"):
+            continue # Answered as part of an earlier step
+        if speed:
+            wait = record["t"] / speed - (perf_counter() - started)
+            if wait > 0:
+                sleep(wait)
+        try:
+            if "stream" in record:
+                record["replayed"] = True
+                start.user_stream.batch = record["stream"]
+                start.listen(0)
+                steps["stream_batches"] += 1
+            elif record["path"].endswith(("/allOrders", "/openOrders")):
+                start.poll(record["params"]["symbol"])
+                steps["polls"] += 1
+            elif record["path"].endswith("/account"):
+                balance = start.get_balance()
+                start.notify("Balance: " + str(format(balance, '.2f')) + " " + start.currency)
+                steps["balance_checks"] += 1
+            else:
+                continue # eg. exchangeInfo at startup
+        except ReplayMissing as e:
+            print("-- Not in the recording: " + str(e) + " --", file=sys.stderr)
+            steps["missing"] += 1
+        start.coalescer.flush()
+    return steps
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a RECORD_API recording through the order checks, notifications and balance valuation")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0, help="1 replays at recorded speed, 2 twice as fast, 0 (default) as fast as possible")
+    parser.add_argument("--notifications", help="write the notifications to this file, one per line, to compare runs")
+    parser.add_argument("--verbose", action="store_true", help="show what start.py prints")
+    parser.add_argument("--json", help="also write the results to this file as JSON, - for stdout")
+    args = parser.parse_args()
+
+    meta, records = read_recording(args.recording)
+    apprise = CollectingApprise()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with output:
+        prepare_start(meta, ReplayClient(records), apprise)
+        wall_start, cpu_start = perf_counter(), process_time()
+        steps = replay(records, args.speed)
+        start.dispatcher.queue.join()
+        wall, cpu = perf_counter() - wall_start, process_time() - cpu_start
+
+    responses = [record for record in records if "path" in record]
+    results = dict(steps,
+        responses           = len(responses),
+        responses_replayed  = sum(1 for record in responses if record.get("replayed")),
+        notifications       = len(apprise.notifications),
+        wall_s              = wall,
+        cpu_s               = cpu,
+        responses_per_s     = len(responses) / wall if wall else None,
+    )
+    for name, value in results.items():
+        print(name.ljust(24) + (format(value, '.3f') if isinstance(value, float) else str(value)).rjust(12))
+
+    if args.notifications:
+        with open(args.notifications, "w") as f:
+            for notification in apprise.notifications:
+                f.write(notification.replace("\n", "\\n") + "\n")
+    if args.json:
+        output = json.dumps({"python": platform.python_version(), "recording": args.recording, "results": results}, indent=1)
+        if args.json == "-":
+            print(output)
+        else:
+            with open(args.json, "w") as f:
+                f.write(output + "\n")
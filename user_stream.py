@@ -0,0 +1,101 @@
+# Binance user data stream
+# Turns executionReport messages into order dicts shaped like the ones get_all_orders returns,
+# so start.py can categorise them with check() exactly like polled orders
+
+import asyncio
+import json
+from queue import Queue, Empty
+from threading import Thread
+
+import websockets
+
+STREAM_URL = "wss://stream.binance.com:9443/"
+
+# Events put on UserStream.events
+STREAM_CONNECTED = "connected" # The socket (re)connected, orders may have changed while it was down
+STREAM_ORDER     = "order"     # An order changed
+
+# Convert an executionReport message into a get_all_orders style order
+def execution_report_to_order(message):
+    return {
+        "symbol":        message["s"],
+        "orderId":       message["i"],
+        "clientOrderId": message["c"],
+        "side":          message["S"],
+        "type":          message["o"],
+        "status":        message["X"],
+        "price":         message["p"],
+        "origQty":       message["q"],
+        "executedQty":   message["z"],
+        "time":          message["O"],
+        "updateTime":    message["T"],
+    }
+
+class UserStream:
+
+    def __init__(self, client, stream_url = STREAM_URL, keepalive_interval = 1800, reconnect_delay = 5):
+
+        # client only needs stream_get_listen_key() and stream_keepalive(), a python-binance Client works
+        self.client             = client
+        self.stream_url         = stream_url
+        self.keepalive_interval = keepalive_interval # Binance expires a listenKey after 60 minutes without a keepalive
+        self.reconnect_delay    = reconnect_delay
+
+        # Working
+        self.events             = Queue()
+        self.listen_key         = None
+        self.thread             = None
+
+    # Run the stream in a background thread
+    def start(self):
+        self.thread = Thread(target=asyncio.run, args=(self.run(),), name="user_stream", daemon=True)
+        self.thread.start()
+
+    # Wait up to timeout seconds for the first event, then return it with everything else already queued
+    def get_events(self, timeout = None):
+        try:
+            events = [self.events.get(timeout=timeout)]
+        except Empty:
+            return []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except Empty:
+                return events
+
+    # Connect, read messages and reconnect forever
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            keepalive = None
+            try:
+                self.listen_key = await loop.run_in_executor(None, self.client.stream_get_listen_key)
+                async with websockets.connect(self.stream_url + "ws/" + self.listen_key) as socket:
+                    print("-- User data stream connected --")
+                    self.events.put((STREAM_CONNECTED, None))
+                    keepalive = asyncio.ensure_future(self.keepalive(self.listen_key))
+                    while True:
+                        message = json.loads(await socket.recv())
+                        if message.get("e") == "executionReport":
+                            self.events.put((STREAM_ORDER, execution_report_to_order(message)))
+                        elif message.get("e") == "listenKeyExpired":
+                            print("-- User data stream listenKey expired --")
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("-- User data stream disconnected: " + repr(e) + " --")
+            finally:
+                if keepalive:
+                    keepalive.cancel()
+            await asyncio.sleep(self.reconnect_delay)
+
+    # Keep the listenKey alive while the socket using it is open
+    async def keepalive(self, listen_key):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await loop.run_in_executor(None, self.client.stream_keepalive, listen_key)
+            except Exception as e:
+                print("-- User data stream keepalive failed: " + repr(e) + " --")